@@ -22,12 +22,12 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 import json
 import uuid
-from services.blockchain_service import BlockchainService
 from services.did_services import DIDService
 from services.wallet_service import WalletService
 from services.llm_service import LLMService
 from services.simulation_service import SimulationService
-from services.address_manager import AddressManager
+from services.address_manager import get_address_manager
+from services.bootstrap import get_blockchain_service
 
 
 app = FastAPI(title="SSI-IoV API", version="1.0.0")
@@ -93,11 +93,11 @@ class RegisteredUser(BaseModel):
 def startup_event():
     global blockchain_service
     global did_service
-    did_service = DIDService()
-    blockchain_service = BlockchainService()
+    blockchain_service = get_blockchain_service()
+    did_service = DIDService(blockchain_service=blockchain_service)
     
     # Force loading addresses
-    AddressManager(blockchain_service=blockchain_service)
+    get_address_manager(blockchain_service=blockchain_service)
 
     print("System initialized. Blockchain + addresses ready.")
 
@@ -107,9 +107,8 @@ async def verify_did(credentials: HTTPAuthorizationCredentials = Security(securi
     did = credentials.credentials
     try:
         # Verify DID exists and is valid
-        doc = did_service.get_did_document(did)
         print(f"ptring fro serverrrrrr  {did}")
-        if not doc:
+        if not did_service.has_did_document(did):
             raise HTTPException(status_code=401, detail="Invalid DID")
         return did
     except Exception as e:
@@ -158,13 +157,13 @@ async def register_vehicle(registration: VehicleRegistration, owner_did: str = D
         
         # Register vehicle on blockchain
         tx_hash = blockchain_service.register_vehicle(
-            registration.owner_did,
-            vehicle_did,
-            vehicle_wallet_did,
-            registration.make,
-            registration.model,
-            registration.year,
-            registration.vin
+            vin=registration.vin,
+            owner_did=registration.owner_did,
+            entity_did=vehicle_did,
+            year=registration.year,
+            make=registration.make,
+            model=registration.model,
+            wallet_did=vehicle_wallet_did
         )
         
         # Create vehicle wallet
@@ -404,8 +403,11 @@ def respond_to_request(
 ):
     """Respond to a data request and log the response."""
     # logging.info("in respose to request")
-    payload = request["payload"]
-    payload = json.loads(payload)    
+    # iter_entity_interactions has already resolved and decoded the payload
+    payload = request.get("payload_data")
+    if not isinstance(payload, dict):
+        # Payload was not a JSON object, or its content store entry is unavailable
+        return None
     
     # Create response body
     llm_approved, llm_reason = llm_service.evaluate_request(
@@ -482,22 +484,20 @@ def respond_to_request(
 async def get_wallet_requests(did: str = Depends(verify_did)):
     """Get all requests for a specific DID"""
     res = []
-    requests = blockchain_service.get_entity_interactions(did)
-    if not requests:
-        return {"requests": []}
+    # Filter to incoming requests before they are converted to dicts
+    requests = blockchain_service.iter_entity_interactions(
+        did, predicate=lambda interaction: interaction[3] == did
+    )
         
     for request in requests:
         # Only process incoming requests that haven't been processed
-        if 'destination_identifier' in request:
-            if (request['destination_identifier'] == did and 
-                'llm_decision' not in request):
-                processed_request = respond_to_request(request, did)
-                if processed_request:
-                    res.append(processed_request)
-            # Include already processed requests
-            elif (request['destination_identifier'] == did and 
-                'llm_decision' in request):
-                res.append(request)
+        if 'llm_decision' not in request:
+            processed_request = respond_to_request(request, did)
+            if processed_request:
+                res.append(processed_request)
+        # Include already processed requests
+        else:
+            res.append(request)
             
     return {"requests": res}
 
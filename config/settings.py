@@ -13,6 +13,9 @@ class Settings:
     ACCOUNT = os.getenv('BLOCKCHAIN_ACCOUNT', '')
     PRIVATE_KEY = os.getenv('BLOCKCHAIN_PRIVATE_KEY', '')
     ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY', os.urandom(32))
+    MULTICALL3_ADDRESS = os.getenv('MULTICALL3_ADDRESS', '0xcA11bde05977b3631167028862bE2a173976CA11')
+    # Block the contract was deployed in; event scans start here instead of genesis
+    DEPLOY_BLOCK = int(os.getenv('DEPLOY_BLOCK', '0'))
 
 class BlockchainConfig:
     # Load ABI from contract JSON file
@@ -1,13 +1,20 @@
 import streamlit as st
+import pandas as pd
 import json
+import logging
 from datetime import datetime
 from services.blockchain_service import BlockchainService
 from services.did_services import DIDService
 from services.wallet_service import WalletService
 from services.llm_service import LLMService
 from services.simulation_service import SimulationService, Entity, Position
+from services.serialization import loads
+from services.bootstrap import get_blockchain_service
 import uuid
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 #import pages
 from pages.home_page import HomePage
@@ -17,6 +24,8 @@ from pages.vehicle_inspection_page import VehicleInspectionPage
 from pages.wallet import RenderWalletUI
 from wallet.entity_wallet import EntityWallet
 
+logger = logging.getLogger(__name__)
+
 class SmartCarSimulator:
     def __init__(self):
         self.sensors = {
@@ -91,17 +100,92 @@ class SSIWallet:
         """Get list of blocked users"""
         return self.blocked_users
 
+# Interactions rendered per page in the history tabs
+_HISTORY_PAGE_SIZE = 25
+
+# Maximum options rendered by _searchable_select
+_SELECT_DISPLAY_MAX = 50
+
+# Display format for interaction timestamps
+_TS_FMT = "%Y-%m-%d %H:%M:%S"
+
+def _to_datetime(ts) -> datetime:
+    """Convert an epoch or ISO-8601 timestamp to a datetime."""
+    if isinstance(ts, str):
+        return datetime.fromisoformat(ts)
+    return datetime.fromtimestamp(ts)
+
+_USER_TYPES = (
+    "Individual",           # 0
+    "Mechanic",             # 1
+    "Insurance Provider",   # 2
+    "Roadside Unit",        # 3
+    "Vehicle Manufacturer", # 4
+    "Vehicle"               # 5
+)
+
+@lru_cache(maxsize=16)
+def _user_type_name(type_id: int) -> str:
+    """Get user type name from type ID."""
+    return _USER_TYPES[type_id] if type_id < len(_USER_TYPES) else f"Unknown ({type_id})"
+
+@lru_cache(maxsize=512)
+def _parse_did_doc(doc_str: str) -> dict:
+    """Parse a DID document string once per distinct document. Treat the result as read-only."""
+    return loads(doc_str)
+
+@st.cache_resource
+def _shared_blockchain_service() -> BlockchainService:
+    """Web3 client and contract shared across sessions and reruns."""
+    return get_blockchain_service()
+
+@st.cache_resource
+def _shared_did_service() -> DIDService:
+    """DID service (and its address manager) shared across sessions and reruns."""
+    return DIDService(blockchain_service=_shared_blockchain_service())
+
+@st.cache_data(ttl=30, max_entries=1024)
+def _cached_user_vehicles(_did_service: DIDService, did: str) -> list:
+    """Vehicles owned by a DID, cached across form reruns."""
+    return _did_service.get_user_vehicles(did)
+
+@st.cache_data(ttl=60, max_entries=1024)
+def _cached_registered_users(_blockchain_service: BlockchainService) -> list:
+    """Registered users, cached so reruns do not hit the chain."""
+    return _blockchain_service.get_registered_users()
+
+@st.cache_data(ttl=60, max_entries=1024)
+def _cached_registered_users_of_types(_blockchain_service: BlockchainService, type_ids: tuple) -> list:
+    """Registered users of the given type IDs, filtered once per cached user list."""
+    return [user for user in _cached_registered_users(_blockchain_service) if user['type'] in type_ids]
+
+@st.cache_data(ttl=30, max_entries=1024)
+def _cached_users_batch(_blockchain_service: BlockchainService, addresses: tuple) -> list:
+    """User tuples for the given addresses, fetched in one batched read."""
+    return _blockchain_service.get_users_batch(list(addresses))
+
+@st.cache_data(ttl=60, max_entries=1024)
+def _cached_did_documents(_did_service: DIDService, dids: tuple) -> list:
+    """DID documents for several DIDs, fetched concurrently and cached as one entry."""
+    return _did_service.get_did_documents(list(dids))
+
 class IoVSSIPlatform:
     def __init__(self):
         """Initialize the IoV SSI Platform with required services."""
-        self.blockchain_service = BlockchainService()
-        self.did_service = DIDService()
+        self.blockchain_service = _shared_blockchain_service()
+        self.did_service = _shared_did_service()
         self.wallet_service = WalletService()
         self.llm_service = LLMService()
-        self.simulation_service = SimulationService()
         self.wallet_polices = EntityWallet()
-        
-        # Initialize session state
+
+    @property
+    def simulation_service(self) -> SimulationService:
+        """Per-session simulation; the platform itself is shared across sessions."""
+        return st.session_state.simulation_service
+
+    def _init_session_state(self):
+        """Initialize per-session state. Runs on every rerun since the platform instance is shared."""
+        self.wallet_polices._initialize_session_state()
         if 'simulation_running' not in st.session_state:
             st.session_state.simulation_running = False
         if 'notifications' not in st.session_state:
@@ -110,9 +194,9 @@ class IoVSSIPlatform:
             st.session_state.initialized_wallets = False
         
         # Set up simulation entities
-        if not st.session_state.get('simulation_initialized', False):
+        if 'simulation_service' not in st.session_state:
+            st.session_state.simulation_service = SimulationService()
             self._initialize_simulation()
-            st.session_state.simulation_initialized = True
 
     def _initialize_simulation(self):
         """Initialize simulation with some example entities."""
@@ -138,6 +222,7 @@ class IoVSSIPlatform:
 
     def run(self):
         # st.title("IOV Self-Sovereign Identity Platform")
+        self._init_session_state()
         
         menu = [
             "Home", 
@@ -150,7 +235,7 @@ class IoVSSIPlatform:
             "Wallet",
             "Issue Credentials"  # Added new page
         ]
-        choice = st.sidebar.selectbox("Navigation", menu)
+        choice = st.sidebar.selectbox("Navigation", menu, key="page")
         
         if choice == "Home":
             HomePage(self)
@@ -171,41 +256,11 @@ class IoVSSIPlatform:
         elif choice == "Issue Credentials":  # Added new page handler
             self._issue_credentials_page()
 
-    def _count_user_types(self, registered_addresses):
-        """Count different types of users"""
-        counts = {
-            'RSU': 0,
-            'Insurance': 0,
-            'Companies': 0,  # Other companies
-            'Vehicles': 0    # Added vehicle count
-        }
-        
-        for address in registered_addresses:
-            user = self.blockchain_service.contract.functions.users(address).call()
-            user_type = self._get_user_type_name(user[2])
-            if user_type == 'Roadside Unit':
-                counts['RSU'] += 1
-            elif user_type == 'Insurance Provider':
-                counts['Insurance'] += 1
-            elif user_type in ['Mechanic', 'Vehicle Manufacturer']:
-                counts['Companies'] += 1
-            
-            # Count vehicles by checking DID document's service endpoints
-            if user[3]:  # If user has a DID
-                user_doc = self.did_service.get_did_document(user[3])
-                if user_doc and 'service_endpoints' in user_doc:
-                    vehicle_count = sum(1 for endpoint in user_doc['service_endpoints'] 
-                                     if endpoint.get('type') == 'VehicleOwnership')
-                    counts['Vehicles'] += vehicle_count
-        
-        return counts
-
-  
     def _dids_overview_page(self):
         st.title("DIDs Overview")
         
         try:
-            registered_addresses = self.blockchain_service.contract.functions.getRegisteredAddresses().call()
+            registered_addresses = self.blockchain_service.get_registered_addresses()
             
             if not registered_addresses:
                 st.info("No users registered yet.")
@@ -385,8 +440,7 @@ class IoVSSIPlatform:
 
             if selected_vehicle and selected_rsu:
                 # Verify DIDs and establish DIDComm connection
-                vehicle_doc = self.did_service.get_did_document(vehicle_did)
-                rsu_doc = self.did_service.get_did_document(rsu_did)
+                vehicle_doc, rsu_doc = self.did_service.get_did_documents([vehicle_did, rsu_did])
 
                 if not vehicle_doc or not rsu_doc:
                     st.error("Invalid DIDs detected. Communication not allowed.")
@@ -604,11 +658,14 @@ class IoVSSIPlatform:
                                                 body=response_body
                                             )
                                             
-                                            encrypted_response = self.did_service.encrypt_didcomm_message(
+                                            # Encrypt in the background while the chain payload is serialized
+                                            encryption = self.did_service.encrypt_didcomm_message_async(
                                                 response_message,
                                                 vehicle_doc["authentication"][0],
                                                 rsu_doc["authentication"][0]
                                             )
+                                            response_payload = json.dumps(response_body).encode('utf-8')
+                                            encrypted_response = encryption.result()
                                             
                                             # Store response in wallets
                                             self.wallet_service.store_didcomm_message(vehicle_did, encrypted_response.copy())
@@ -619,7 +676,6 @@ class IoVSSIPlatform:
                                             st.success("Request rejected")
                                             
                                             # Record rejection on blockchain
-                                            response_payload = json.dumps(response_body).encode('utf-8')
                                             tx_hash = self.did_service.record_interaction(
                                                 vehicle_address,
                                                 rsu_address,
@@ -644,16 +700,176 @@ class IoVSSIPlatform:
                     if history:
                         for interaction in history:
                             with st.expander(f"{interaction['type']} - {interaction['timestamp']}"):
-                                st.write("**From:** ", interaction['sender_did'])
-                                st.write("**To:** ", interaction['recipient_did'])
-                                st.write("**Type:** ", interaction['type'])
-                                st.write("**Details:** ", interaction['payload'])
-                                st.write("**Transaction Hash:** ", interaction['tx_hash'])
+                                st.markdown(
+                                    f"**From:** {interaction['sender_did']}\n\n"
+                                    f"**To:** {interaction['recipient_did']}\n\n"
+                                    f"**Type:** {interaction['type']}\n\n"
+                                    f"**Details:** {interaction['payload']}\n\n"
+                                    f"**Transaction Hash:** {interaction['tx_hash']}"
+                                )
                     else:
                         st.info("No interaction history found")
                 except Exception as e:
                     st.error(f"Error fetching interaction history: {str(e)}")
 
+    def _get_consented_data_types(self, did: str) -> frozenset:
+        """
+        Get the data types an entity has consented to share, memoized in the
+        session until the wallet's policies change.
+        
+        Args:
+            did: DID of the entity whose wallet policies are checked
+        """
+        version = self.wallet_service.get_policy_version(did)
+        cached = st.session_state.get(f"allowed_set_{did}")
+        if cached and cached[0] == version:
+            return cached[1]
+        
+        vehicle_wallet = self.wallet_service.get_wallet(did)
+        if vehicle_wallet is None:
+            # No wallet yet; nothing is consented, and nothing is memoized until one exists
+            return frozenset()
+        policies = vehicle_wallet.get('policies', {})
+        allowed_set = frozenset(k for k, v in policies.items() if v.get('consent', False))
+        st.session_state[f"allowed_set_{did}"] = (version, allowed_set)
+        return allowed_set
+
+    def _queue_inbox_action(self, action: dict):
+        """
+        Button callback that queues an inbox action for the next script run.
+        
+        Args:
+            action: Dictionary describing the action (kind, vehicle_did, sender_did, ...)
+        """
+        st.session_state.setdefault('inbox_actions', []).append(action)
+
+    def _drain_inbox_actions(self):
+        """
+        Apply queued unblock/respond actions in a single pass so the
+        click-triggered run renders the updated state without a second rerun.
+        """
+        actions = st.session_state.get('inbox_actions')
+        if not actions:
+            return
+        st.session_state.inbox_actions = []
+        
+        for action in actions:
+            kind = action['kind']
+            vehicle_did = action['vehicle_did']
+            sender_did = action['sender_did']
+            
+            if kind == "unblock":
+                self.wallet_service.unblock_user(vehicle_did, sender_did)
+                st.success(f"Unblocked {action['user_name']}")
+                continue
+            
+            self._respond(
+                action['decision'],
+                action['request'],
+                vehicle_did,
+                sender_did,
+                action['ai_response'],
+                action['sensors']
+            )
+
+    # Decision-specific response fields and confirmation text for _respond
+    _RESPONSE_BUILDERS = {
+        "approved": (
+            lambda request, sensors: {
+                "data": {k: sensors[k] for k in request['requested_data'] if k in sensors}
+            },
+            "Request approved and data sent!"
+        ),
+        "denied": (
+            lambda request, sensors: {"reason": "Request denied by vehicle owner"},
+            "Request denied!"
+        ),
+    }
+
+    def _respond(self, decision: str, request: dict, vehicle_did: str, sender_did: str,
+                 ai_response: str, sensors: dict):
+        """
+        Answer a pending mechanic request on behalf of the vehicle.
+        
+        Args:
+            decision: "approved" or "denied"
+            request: The pending request being answered
+            vehicle_did: DID of the responding vehicle
+            sender_did: DID of the requesting mechanic
+            ai_response: The vehicle LLM's analysis of the request
+            sensors: Sensor snapshot used to fill approved data
+        """
+        build_fields, confirmation = self._RESPONSE_BUILDERS[decision]
+        now_iso = datetime.now().isoformat(timespec='milliseconds')
+        now_us = time.time_ns() // 1000
+        response_data = {
+            "status": decision,
+            **build_fields(request, sensors),
+            "ai_response": ai_response,
+            "timestamp": now_iso
+        }
+        
+        # Create response message
+        response_message = self.did_service.create_didcomm_message(
+            sender_did=vehicle_did,
+            recipient_did=sender_did,
+            message_type="mechanic_response",
+            body=response_data
+        )
+        
+        # Store and remove request
+        self.wallet_service.store_didcomm_message(vehicle_did, response_message)
+        self.wallet_service.remove_pending_request(vehicle_did, request)
+        
+        # Record on blockchain
+        try:
+            response_payload = self.wallet_service.store_interaction_payload(
+                json.dumps({**response_data, "timestamp": now_us}).encode('utf-8')
+            )
+            tx_hash = self.did_service.record_interaction(
+                self.blockchain_service.get_address_by_did(vehicle_did),
+                self.blockchain_service.get_address_by_did(sender_did),
+                vehicle_did,
+                sender_did,
+                "mechanic_response",
+                response_payload
+            )
+        except Exception as e:
+            st.error(f"Error recording response: {str(e)}")
+        
+        st.success(confirmation)
+
+    def _vehicle_llm_batch(self, requests: list, llm_config: dict, sensors: dict) -> list:
+        """
+        Process pending requests with the vehicle's LLM concurrently.
+        
+        Args:
+            requests: Pending requests to evaluate
+            llm_config: Vehicle LLM configuration
+            sensors: Sensor snapshot passed as context
+            
+        Returns:
+            list: One response per request, or the exception raised for it
+        """
+        def process(request):
+            try:
+                return self.llm_service.process_request(
+                    request['content'],
+                    llm_config,
+                    context={
+                        "action_type": request.get('action_type'),
+                        "requested_data": request.get('requested_data'),
+                        "is_urgent": request.get('is_urgent'),
+                        "sender_did": request.get('sender_did', ''),
+                        "sensors": sensors
+                    }
+                )
+            except Exception as e:
+                return e
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return list(executor.map(process, requests))
+
     def _mechanic_vehicle_interaction(self):
         """
         Handle mechanic-to-vehicle and vehicle-to-mechanic interactions.
@@ -661,6 +877,9 @@ class IoVSSIPlatform:
         """
         st.header("Mechanic-Vehicle Interaction")
         
+        # Apply any inbox clicks from the previous run before rendering
+        self._drain_inbox_actions()
+        
         # Get list of mechanics and vehicles
         mechanics = self.blockchain_service.get_registered_mechanic()
         vehicles = self.blockchain_service.get_registered_vehicles()
@@ -677,8 +896,9 @@ class IoVSSIPlatform:
             )
             
             if selected_mechanic:
+                # DID documents are not needed to render this page, so they are
+                # no longer resolved here on every rerun
                 mechanic_did = selected_mechanic.split(' (')[1].rstrip(')')
-                mechanic_doc = self.did_service.get_did_document(mechanic_did)
                 
                 # Mechanic's LLM configuration
                 st.write("Mechanic's AI Assistant")
@@ -715,17 +935,18 @@ class IoVSSIPlatform:
             
             if selected_vehicle:
                 vehicle_did = selected_vehicle.split(' (')[1].rstrip(')')
-                vehicle_doc = self.did_service.get_did_document(vehicle_did)
                 
                 # Get vehicle simulator for sensor data
                 simulator = st.session_state.simulators.get(vehicle_did)
+                # Single snapshot so the LLM context and approval payload agree
+                sensor_snapshot = dict(simulator.sensors) if simulator else {}
                 if simulator:
-                    # Display current sensor data
-                    st.write("Current Vehicle Status:")
-                    speed = simulator.sensors.get('speed', 0)
-                    st.write(f"Speed: {speed:.1f} km/h")
-                    motion_status = "🅿️ Parked" if speed < 0.5 else "🚗 In Motion"
-                    st.write(f"Status: {motion_status}")
+                    # Display current sensor data only when requested
+                    with st.expander("Live Sensors", expanded=False):
+                        speed = sensor_snapshot.get('speed', 0)
+                        st.write(f"Speed: {speed:.1f} km/h")
+                        motion_status = "🅿️ Parked" if speed < 0.5 else "🚗 In Motion"
+                        st.write(f"Status: {motion_status}")
                 
                 # Add blocked users management
                 st.subheader("Blocked Users")
@@ -744,10 +965,17 @@ class IoVSSIPlatform:
                             st.write(f"Blocked on: {user['blocked_at']}")
                             st.write(f"Reason: {user['reason']}")
                         with col2:
-                            if st.button("Unblock", key=f"unblock_{user['did']}"):
-                                self.wallet_service.unblock_user(vehicle_did, user['did'])
-                                st.success(f"Unblocked {user_name}")
-                                st.rerun()
+                            st.button(
+                                "Unblock",
+                                key=f"unblock_{user['did']}",
+                                on_click=self._queue_inbox_action,
+                                args=({
+                                    "kind": "unblock",
+                                    "vehicle_did": vehicle_did,
+                                    "sender_did": user['did'],
+                                    "user_name": user_name
+                                },)
+                            )
                 else:
                     st.info("No blocked users")
                 
@@ -756,7 +984,7 @@ class IoVSSIPlatform:
                     "role": "vehicle",
                     "systems": ["engine", "transmission", "electronics", "safety"],
                     "access_level": "owner",
-                    "sensors": simulator.sensors if simulator else {}
+                    "sensors": sensor_snapshot
                 }
         
         # Interaction Tabs
@@ -788,6 +1016,10 @@ class IoVSSIPlatform:
                         }
                     )
                     
+                    # One timestamp for the whole send; ISO for wallets, epoch µs on-chain
+                    now_iso = datetime.now().isoformat(timespec='milliseconds')
+                    now_us = time.time_ns() // 1000
+                    
                     # Create request body
                     body = {
                         "action_type": action_type,
@@ -795,31 +1027,23 @@ class IoVSSIPlatform:
                         "llm_analysis": mechanic_llm_response,
                         "requested_data": requested_data,
                         "is_urgent": is_urgent,
-                        "timestamp": datetime.now().isoformat(),
+                        "timestamp": now_iso,
                         "sender_did": mechanic_did,
                         "recipient_did": vehicle_did
                     }
                     
-                    # Get vehicle's policies
-                    vehicle_wallet = self.wallet_service.get_wallet(vehicle_did)
-                    policies = vehicle_wallet.get('policies', {})
-                    
                     # Check if requested data types are allowed
-                    allowed_data = []
-                    denied_data = []
-                    for data_type in requested_data:
-                        policy = policies.get(data_type, {})
-                        if policy.get('consent', False):
-                            allowed_data.append(data_type)
-                        else:
-                            denied_data.append(data_type)
+                    allowed_set = self._get_consented_data_types(vehicle_did)
+                    requested_set = set(requested_data)
+                    allowed_data = [d for d in requested_data if d in allowed_set]
+                    denied_data = list(requested_set - allowed_set)
                     
                     if not allowed_data:
                         # If no data types are allowed, reject immediately
                         response_data = {
                             "status": "denied",
                             "reason": f"No consent for requested data types: {', '.join(requested_data)}",
-                            "timestamp": datetime.now().isoformat()
+                            "timestamp": now_iso
                         }
                         
                         # Create response message
@@ -835,7 +1059,9 @@ class IoVSSIPlatform:
                         
                         # Record on blockchain
                         try:
-                            response_payload = json.dumps(response_data).encode('utf-8')
+                            response_payload = self.wallet_service.store_interaction_payload(
+                                json.dumps({**response_data, "timestamp": now_us}).encode('utf-8')
+                            )
                             tx_hash = self.did_service.record_interaction(
                                 vehicle_address,
                                 mechanic_address,
@@ -860,7 +1086,7 @@ class IoVSSIPlatform:
                             "llm_analysis": mechanic_llm_response,
                             "requested_data": allowed_data,  # Only include allowed data types
                             "is_urgent": is_urgent,
-                            "timestamp": datetime.now().isoformat(),
+                            "timestamp": now_iso,
                             "sender_did": mechanic_did,
                             "recipient_did": vehicle_did
                         }
@@ -882,7 +1108,9 @@ class IoVSSIPlatform:
                         
                         # Record on blockchain
                         try:
-                            interaction_payload = json.dumps(body).encode('utf-8')
+                            interaction_payload = self.wallet_service.store_interaction_payload(
+                                json.dumps({**body, "timestamp": now_us}).encode('utf-8')
+                            )
                             tx_hash = self.did_service.record_interaction(
                                 mechanic_address,
                                 vehicle_address,
@@ -907,7 +1135,9 @@ class IoVSSIPlatform:
                     if not pending_requests:
                         st.info("No pending requests")
                     else:
-                        for request in pending_requests:
+                        # Evaluate every pending request up front instead of one LLM call per row
+                        llm_responses = self._vehicle_llm_batch(pending_requests, vehicle_llm_config, sensor_snapshot)
+                        for request, vehicle_llm_response in zip(pending_requests, llm_responses):
                             try:
                                 sender_did = request.get('sender_did', '')
                                 sender_name = sender_did  # Default to DID
@@ -917,30 +1147,11 @@ class IoVSSIPlatform:
                                         break
                                 
                                 with st.expander(f"Request from {sender_name}"):
-                                    st.write("Request Details:")
-                                    if 'action_type' in request:
-                                        st.write(f"Type: {request['action_type']}")
-                                    if 'content' in request:
-                                        st.write(f"Message: {request['content']}")
-                                    if 'requested_data' in request:
-                                        st.write(f"Requested Data: {', '.join(request['requested_data'])}")
-                                    if 'is_urgent' in request:
-                                        st.write(f"Urgent: {'Yes' if request['is_urgent'] else 'No'}")
-                                    if 'llm_analysis' in request:
-                                        st.write("AI Analysis:", request['llm_analysis'])
+                                    st.markdown(self._request_details_markdown(request, "AI Analysis"))
                                     
-                                    # Process with vehicle's LLM
-                                    vehicle_llm_response = self.llm_service.process_request(
-                                        request['content'],
-                                        vehicle_llm_config,
-                                        context={
-                                            "action_type": request.get('action_type'),
-                                            "requested_data": request.get('requested_data'),
-                                            "is_urgent": request.get('is_urgent'),
-                                            "sender_did": sender_did,
-                                            "sensors": simulator.sensors if simulator else {}
-                                        }
-                                    )
+                                    # Surface this request's LLM failure in its own row
+                                    if isinstance(vehicle_llm_response, Exception):
+                                        raise vehicle_llm_response
                                     
                                     st.write("Vehicle AI Analysis:", vehicle_llm_response)
                                     
@@ -957,15 +1168,17 @@ class IoVSSIPlatform:
                                     
                                     # If LLM detected unsafe motion state and suspicious activity
                                     if not is_motion_safe and is_suspicious:
+                                        now_iso = datetime.now().isoformat(timespec='milliseconds')
+                                        now_us = time.time_ns() // 1000
                                         response_data = {
                                             "status": "denied",
                                             "reason": "Request denied - Vehicle in motion and request deemed suspicious",
                                             "ai_response": vehicle_llm_response,
                                             "sensor_data": {
-                                                "speed": simulator.sensors.get('speed', 0),
-                                                "timestamp": datetime.now().isoformat()
+                                                "speed": sensor_snapshot.get('speed', 0),
+                                                "timestamp": now_iso
                                             },
-                                            "timestamp": datetime.now().isoformat()
+                                            "timestamp": now_iso
                                         }
                                         
                                         # Block user if suspicious
@@ -973,7 +1186,7 @@ class IoVSSIPlatform:
                                             self.wallet_service.block_user(
                                                 vehicle_did, 
                                                 sender_did,
-                                                reason=f"Suspicious request while vehicle in motion. Speed: {simulator.sensors.get('speed', 0)} km/h"
+                                                reason=f"Suspicious request while vehicle in motion. Speed: {sensor_snapshot.get('speed', 0)} km/h"
                                             )
                                             response_data["reason"] += " User has been blocked due to suspicious activity."
                                         
@@ -991,7 +1204,9 @@ class IoVSSIPlatform:
                                         
                                         # Record on blockchain with LLM decision
                                         try:
-                                            response_payload = json.dumps(response_data).encode('utf-8')
+                                            response_payload = self.wallet_service.store_interaction_payload(
+                                                json.dumps({**response_data, "timestamp": now_us}).encode('utf-8')
+                                            )
                                             tx_hash = self.did_service.record_interaction(
                                                 vehicle_address,
                                                 mechanic_address,
@@ -1004,88 +1219,43 @@ class IoVSSIPlatform:
                                             st.error(f"Error recording response: {str(e)}")
                                         
                                         st.error("Request automatically rejected - Unsafe motion state detected")
-                                        st.rerun()
                                         continue
                                     
-                                    # Add approve/deny buttons for manual decision if motion is safe
+                                    # Add approve/deny buttons for manual decision if motion is safe.
+                                    # Clicks are queued and applied at the top of the next run.
                                     if is_motion_safe:
                                         col1, col2 = st.columns(2)
                                         with col1:
-                                            if st.button(f"Approve {sender_name}", key=f"approve_{sender_did}"):
-                                                # Prepare response data
-                                                response_data = {
-                                                    "status": "approved",
-                                                    "data": {k: simulator.sensors[k] for k in request['requested_data'] if k in simulator.sensors},
+                                            st.button(
+                                                f"Approve {sender_name}",
+                                                key=f"approve_{sender_did}",
+                                                on_click=self._queue_inbox_action,
+                                                args=({
+                                                    "kind": "respond",
+                                                    "decision": "approved",
+                                                    "vehicle_did": vehicle_did,
+                                                    "sender_did": sender_did,
+                                                    "request": request,
                                                     "ai_response": vehicle_llm_response,
-                                                    "timestamp": datetime.now().isoformat()
-                                                }
-                                                
-                                                # Create response message
-                                                response_message = self.did_service.create_didcomm_message(
-                                                    sender_did=vehicle_did,
-                                                    recipient_did=sender_did,
-                                                    message_type="mechanic_response",
-                                                    body=response_data
-                                                )
-                                                
-                                                # Store and remove request
-                                                self.wallet_service.store_didcomm_message(vehicle_did, response_message)
-                                                self.wallet_service.remove_pending_request(vehicle_did, request)
-                                                
-                                                # Record on blockchain
-                                                try:
-                                                    response_payload = json.dumps(response_data).encode('utf-8')
-                                                    tx_hash = self.did_service.record_interaction(
-                                                        vehicle_address,
-                                                        mechanic_address,
-                                                        vehicle_did,
-                                                        sender_did,
-                                                        "mechanic_response",
-                                                        response_payload
-                                                    )
-                                                except Exception as e:
-                                                    st.error(f"Error recording response: {str(e)}")
-                                                
-                                                st.success("Request approved and data sent!")
-                                                st.rerun()
+                                                    "sensors": sensor_snapshot
+                                                },)
+                                            )
                                         
                                         with col2:
-                                            if st.button(f"Deny {sender_name}", key=f"deny_{sender_did}"):
-                                                response_data = {
-                                                    "status": "denied",
-                                                    "reason": "Request denied by vehicle owner",
+                                            st.button(
+                                                f"Deny {sender_name}",
+                                                key=f"deny_{sender_did}",
+                                                on_click=self._queue_inbox_action,
+                                                args=({
+                                                    "kind": "respond",
+                                                    "decision": "denied",
+                                                    "vehicle_did": vehicle_did,
+                                                    "sender_did": sender_did,
+                                                    "request": request,
                                                     "ai_response": vehicle_llm_response,
-                                                    "timestamp": datetime.now().isoformat()
-                                                }
-                                                
-                                                # Create response message
-                                                response_message = self.did_service.create_didcomm_message(
-                                                    sender_did=vehicle_did,
-                                                    recipient_did=sender_did,
-                                                    message_type="mechanic_response",
-                                                    body=response_data
-                                                )
-                                                
-                                                # Store and remove request
-                                                self.wallet_service.store_didcomm_message(vehicle_did, response_message)
-                                                self.wallet_service.remove_pending_request(vehicle_did, request)
-                                                
-                                                # Record on blockchain
-                                                try:
-                                                    response_payload = json.dumps(response_data).encode('utf-8')
-                                                    tx_hash = self.did_service.record_interaction(
-                                                        vehicle_address,
-                                                        mechanic_address,
-                                                        vehicle_did,
-                                                        sender_did,
-                                                        "mechanic_response",
-                                                        response_payload
-                                                    )
-                                                except Exception as e:
-                                                    st.error(f"Error recording response: {str(e)}")
-                                                
-                                                st.success("Request denied!")
-                                                st.rerun()
+                                                    "sensors": sensor_snapshot
+                                                },)
+                                            )
                             
                             except Exception as e:
                                 st.error(f"Error processing request: {str(e)}")
@@ -1103,87 +1273,128 @@ class IoVSSIPlatform:
                     if not interactions:
                         st.info("No interaction history found")
                     else:
-                        for interaction in interactions:
+                        # Resolve DIDs to names with one lookup table per rerun
+                        did_to_name = {e['did']: e['name'] for e in mechanics}
+                        did_to_name.update({e['did']: e['name'] for e in vehicles})
+                        
+                        # Hoist loop-invariant lookups
+                        _expander = st.expander
+                        _write = st.write
+                        _markdown = st.markdown
+                        _json = st.json
+                        
+                        # Only render one page of interactions per rerun, newest first
+                        interactions = sorted(interactions, key=lambda i: i.get('timestamp', 0), reverse=True)
+                        max_page = max(1, -(-len(interactions) // _HISTORY_PAGE_SIZE))
+                        page = st.number_input("Page", min_value=1, max_value=max_page, value=1, key="mechanic_history_page")
+                        start = (page - 1) * _HISTORY_PAGE_SIZE
+                        st.caption(f"Showing {start + 1}-{min(start + _HISTORY_PAGE_SIZE, len(interactions))} of {len(interactions)} interactions")
+                        
+                        # Phase 1: build titles and parse payloads for this page up front
+                        parsed = []
+                        for interaction in interactions[start:start + _HISTORY_PAGE_SIZE]:
                             try:
-                                timestamp = datetime.fromtimestamp(interaction.get('timestamp', 0))
+                                timestamp = _to_datetime(interaction.get('timestamp', 0))
                                 source_did = interaction.get('source_identifier', '')
                                 dest_did = interaction.get('destination_identifier', '')
                                 interaction_type = interaction.get('interaction_type', '').lower()
                                 
                                 # Get entity names
-                                source_name = source_did
-                                dest_name = dest_did
-                                for entity in (mechanics + vehicles):
-                                    if entity['did'] == source_did:
-                                        source_name = entity['name']
-                                    if entity['did'] == dest_did:
-                                        dest_name = entity['name']
+                                source_name = did_to_name.get(source_did, source_did)
+                                dest_name = did_to_name.get(dest_did, dest_did)
                                 
                                 # Determine interaction direction
-                                if interaction_type == 'mechanic_response':
-                                    title = f"{timestamp.strftime('%Y-%m-%d %H:%M:%S')} - {dest_name} ← {source_name} (Response)"
-                                else:
-                                    title = f"{timestamp.strftime('%Y-%m-%d %H:%M:%S')} - {dest_name} ← {source_name} (Request)"
-                                
-                                with st.expander(title):
-                                    st.write(f"Type: {interaction.get('interaction_type', 'Unknown')}")
-                                    
-                                    try:
-                                        if 'payload' in interaction:
-                                            payload = interaction['payload']
-                                            if isinstance(payload, (bytes, bytearray)):
-                                                payload = payload.decode('utf-8')
-                                            if isinstance(payload, str):
-                                                payload_data = json.loads(payload)
-                                                if interaction_type == 'mechanic_response':
-                                                    st.write("Response:")
-                                                    if payload_data.get('status') == 'approved':
-                                                        st.success("✓ Approved")
-                                                        if 'data' in payload_data:
-                                                            st.write("Shared Data:")
-                                                            st.json(payload_data['data'])
-                                                        if 'ai_response' in payload_data:
-                                                            st.write("Vehicle AI Analysis:", payload_data['ai_response'])
-                                                    else:
-                                                        st.error("✗ Denied")
-                                                        if 'reason' in payload_data:
-                                                            st.write(f"Reason: {payload_data['reason']}")
-                                                        if 'ai_response' in payload_data:
-                                                            st.write("Vehicle AI Analysis:", payload_data['ai_response'])
-                                                else:
-                                                    st.write("Request Details:")
-                                                    if 'action_type' in payload_data:
-                                                        st.write(f"Type: {payload_data['action_type']}")
-                                                    if 'content' in payload_data:
-                                                        st.write(f"Message: {payload_data['content']}")
-                                                    if 'requested_data' in payload_data:
-                                                        st.write(f"Requested Data: {', '.join(payload_data['requested_data'])}")
-                                                    if 'is_urgent' in payload_data:
-                                                        st.write(f"Urgent: {'Yes' if payload_data['is_urgent'] else 'No'}")
-                                                    if 'llm_analysis' in payload_data:
-                                                        st.write("Mechanic AI Analysis:", payload_data['llm_analysis'])
-                                            else:
-                                                st.write("Payload:", payload)
-                                    except Exception as e:
-                                        st.write("Payload: [Could not decode]")
-                                        
+                                direction = "Response" if interaction_type == 'mechanic_response' else "Request"
+                                title = f"{timestamp.strftime(_TS_FMT)} - {dest_name} ← {source_name} ({direction})"
                             except Exception as e:
-                                st.error(f"Error displaying interaction: {str(e)}")
+                                parsed.append((interaction, None, None, "failed", str(e)))
+                                continue
+                            
+                            if 'payload' not in interaction:
+                                parsed.append((interaction, title, interaction_type, "absent", None))
                                 continue
+                            
+                            payload = interaction['payload']
+                            if isinstance(interaction.get('payload_data'), dict):
+                                parsed.append((interaction, title, interaction_type, "parsed", interaction['payload_data']))
+                                continue
+                            try:
+                                if isinstance(payload, (str, bytes)):
+                                    payload_data = loads(payload)
+                                    if not isinstance(payload_data, dict):
+                                        raise ValueError("payload is not a JSON object")
+                                    parsed.append((interaction, title, interaction_type, "parsed", payload_data))
+                                else:
+                                    parsed.append((interaction, title, interaction_type, "raw", payload))
+                            except Exception:
+                                parsed.append((interaction, title, interaction_type, "undecodable", None))
+                        
+                        # Phase 2: render without exception handling in the loop
+                        for interaction, title, interaction_type, status, payload_data in parsed:
+                            if status == "failed":
+                                st.error(f"Error displaying interaction: {payload_data}")
+                                continue
+                            
+                            with _expander(title):
+                                type_line = f"Type: {interaction.get('interaction_type', 'Unknown')}"
+                                
+                                if status == "undecodable":
+                                    _markdown(f"{type_line}\n\nPayload: [Could not decode]")
+                                elif status == "raw":
+                                    _markdown(f"{type_line}\n\nPayload: {payload_data}")
+                                elif status == "parsed":
+                                    pg = payload_data.get
+                                    if interaction_type == 'mechanic_response':
+                                        _markdown(f"{type_line}\n\nResponse:")
+                                        if pg('status') == 'approved':
+                                            st.success("✓ Approved")
+                                            if 'data' in payload_data:
+                                                _write("Shared Data:")
+                                                _json(pg('data'))
+                                            if 'ai_response' in payload_data:
+                                                _markdown(f"Vehicle AI Analysis: {pg('ai_response')}")
+                                        else:
+                                            st.error("✗ Denied")
+                                            lines = []
+                                            if 'reason' in payload_data:
+                                                lines.append(f"Reason: {pg('reason')}")
+                                            if 'ai_response' in payload_data:
+                                                lines.append(f"Vehicle AI Analysis: {pg('ai_response')}")
+                                            if lines:
+                                                _markdown("\n\n".join(lines))
+                                    else:
+                                        _markdown(f"{type_line}\n\n" + self._request_details_markdown(payload_data, "Mechanic AI Analysis"))
+                                else:
+                                    _markdown(type_line)
                                 
             except Exception as e:
                 st.error(f"Error loading history: {str(e)}")
-    def _get_user_type_name(self, type_id: int) -> str:
+    @staticmethod
+    def _request_details_markdown(request: dict, analysis_label: str) -> str:
+        """
+        Build the request details block as one markdown string.
+        
+        Args:
+            request: Mechanic request body
+            analysis_label: Label for the request's LLM analysis line
+        """
+        lines = ["Request Details:"]
+        if 'action_type' in request:
+            lines.append(f"Type: {request['action_type']}")
+        if 'content' in request:
+            lines.append(f"Message: {request['content']}")
+        if 'requested_data' in request:
+            lines.append(f"Requested Data: {', '.join(request['requested_data'])}")
+        if 'is_urgent' in request:
+            lines.append(f"Urgent: {'Yes' if request['is_urgent'] else 'No'}")
+        if 'llm_analysis' in request:
+            lines.append(f"{analysis_label}: {request['llm_analysis']}")
+        return "\n\n".join(lines)
+
+    @staticmethod
+    def _get_user_type_name(type_id: int) -> str:
         """Get user type name from type ID."""
-        types = [
-            "Individual",          # 0
-            "Mechanic",           # 1
-            "Insurance Provider", # 2
-            "Roadside Unit",     # 3
-            "Vehicle Manufacturer", # 4
-            "Vehicle"            # 5
-        ]
-        return types[type_id] if type_id < len(types) else f"Unknown ({type_id})"
+        return _user_type_name(type_id)
 
     def view_vehicles_page(self):
         """Display all registered vehicles with their detailed information."""
@@ -1193,30 +1404,28 @@ class IoVSSIPlatform:
         try:
             # Get all registered vehicles
             vehicles = []
-            users = self.blockchain_service.get_registered_users()
+            users = _cached_registered_users(self.blockchain_service)
             
-            # First, get all vehicle DIDs
-            for user in users:
-                if user['type'] == 5:  # Check for CAR type
-                    try:
-                        # Get the full DID document for this vehicle
-                        vehicle_doc = self.did_service.get_did_document(user['did'])
-                        if vehicle_doc:
-                            # Extract vehicle info from the document
-                            if isinstance(vehicle_doc, str):
-                                vehicle_doc = json.loads(vehicle_doc)
-
-                            # Extract info from the document
-                            info = vehicle_doc.get('info', [])
-                            created = vehicle_doc.get('created', '')
-                            # print(f"Vehicle created: {created}")
-                            if info:
-                                vehicles.append(info)
-                                
-                            else:
-                                print(f"No valid vehicle info found in document for {user['did']}")
-                    except Exception as e:
-                        print(f"Error processing vehicle {user['did']}: {e}")
+            # First, get all vehicle DIDs and fetch their full DID documents concurrently
+            car_dids = tuple(user['did'] for user in users if user['type'] == 5)  # CAR type
+            for did, vehicle_doc in zip(car_dids, _cached_did_documents(self.did_service, car_dids)):
+                try:
+                    if vehicle_doc:
+                        # Extract vehicle info from the document
+                        if isinstance(vehicle_doc, str):
+                            vehicle_doc = _parse_did_doc(vehicle_doc)
+
+                        # Extract info from the document
+                        info = vehicle_doc.get('info', [])
+                        created = vehicle_doc.get('created', '')
+                        # print(f"Vehicle created: {created}")
+                        if info:
+                            vehicles.append(info)
+                            
+                        else:
+                            logger.warning("No valid vehicle info found in document for %s", did)
+                except Exception as e:
+                    logger.exception("Error processing vehicle %s", did)
 
             if not vehicles:
                 st.warning("No registered vehicles found.")
@@ -1226,31 +1435,38 @@ class IoVSSIPlatform:
             list_view, detail_view = st.tabs(["List View", "Detailed View"])
 
             with list_view:
-                # Create a table of all vehicles
-                table_data = []
+                # Create a table of all vehicles, built column by column
+                columns = {
+                    "Owner": [], "Make": [], "Model": [], "Year": [],
+                    "VIN": [], "Status": [], "Manufacturer": []
+                }
                 for vehicle in vehicles:
-                    owner_info = vehicle[0].get('owner_did', {})
-                    table_data.append({
-                        "Owner": owner_info,
-                        "Make": vehicle[0].get('make', 'N/A'),
-                        "Model": vehicle[0].get('model', 'N/A'),
-                        "Year": vehicle[0].get('year', 'N/A'),
-                        "VIN": vehicle[0].get('vin', 'N/A'),
-                        "Status": vehicle[0].get('status', 'N/A'),
-                        "Manufacturer": vehicle[0].get('manufacturer', 'N/A'),
-                    })
+                    info = vehicle[0]
+                    columns["Owner"].append(info.get('owner_did', {}))
+                    columns["Make"].append(info.get('make', 'N/A'))
+                    columns["Model"].append(info.get('model', 'N/A'))
+                    columns["Year"].append(info.get('year', 'N/A'))
+                    columns["VIN"].append(info.get('vin', 'N/A'))
+                    columns["Status"].append(info.get('status', 'N/A'))
+                    columns["Manufacturer"].append(info.get('manufacturer', 'N/A'))
                 
-                if table_data:
-                    st.dataframe(table_data, use_container_width=True)
+                st.dataframe(pd.DataFrame(columns), use_container_width=True)
 
             with detail_view:
                 # Create a dropdown to select a specific vehicle
-                vehicle_options = []
+                # Index vehicles by VIN once; the first vehicle for a VIN wins
+                by_vin = {}
                 for v in vehicles:
                     vin = v[0].get('vin')
-                    make = v[0].get('make')
-                    model = v[0].get('model')
-                    if vin and make and model:
+                    if vin:
+                        by_vin.setdefault(vin, v)
+                
+                vehicle_options = []
+                for vin, v in by_vin.items():
+                    g = v[0].get
+                    make = g('make')
+                    model = g('model')
+                    if make and model:
                         vehicle_options.append((vin, f"{make} {model} (VIN: {vin})"))
 
                 if vehicle_options:
@@ -1262,31 +1478,35 @@ class IoVSSIPlatform:
 
                     if selected_vin:
                         # Find the selected vehicle
-                        vehicle = next((v for v in vehicles if v[0].get('vin') == selected_vin[0]), None)
+                        vehicle = by_vin.get(selected_vin[0])
                         
                         if vehicle:
+                            info = vehicle[0]
+                            wallet = vehicle[1]
+                            g = info.get
+                            
                             # Create columns for basic info
                             col1, col2, col3 = st.columns(3)
                             
                             with col1:
                                 st.subheader("Basic Information")
-                                st.write(f"**Make:** {vehicle[0].get('make', 'N/A')}")
-                                st.write(f"**Model:** {vehicle[0].get('model', 'N/A')}")
-                                st.write(f"**Year:** {vehicle[0].get('year', 'N/A')}")
-                                st.write(f"**Color:** {vehicle[0].get('color', 'N/A')}")
-                                st.write(f"**VIN:** {vehicle[0].get('vin', 'N/A')}")
-                                st.write(f"**Status:** {vehicle[0].get('status', 'N/A')}")
+                                st.write(f"**Make:** {g('make', 'N/A')}")
+                                st.write(f"**Model:** {g('model', 'N/A')}")
+                                st.write(f"**Year:** {g('year', 'N/A')}")
+                                st.write(f"**Color:** {g('color', 'N/A')}")
+                                st.write(f"**VIN:** {g('vin', 'N/A')}")
+                                st.write(f"**Status:** {g('status', 'N/A')}")
                                 st.write(f"**Created:** {created[:10]}")
 
                             with col2:
                                 st.subheader("Ownership Information")
-                                st.write(f"**Manufacturer:** {vehicle[0].get('manufacturer', 'N/A')}")
+                                st.write(f"**Manufacturer:** {g('manufacturer', 'N/A')}")
                                 
                                 # Get current owner DID
-                                owner = vehicle[0].get('owner_did', 'N/A')
+                                owner = g('owner_did', 'N/A')
                                 
                                 # Get previous owners; ensure it's displayed correctly
-                                prev_owners = vehicle[0].get('previous_owners', [])                            
+                                prev_owners = g('previous_owners', [])                            
                                 st.write(f"**Previous Owner(s):**")
                                 st.json(prev_owners)
                                 own = {
@@ -1301,16 +1521,16 @@ class IoVSSIPlatform:
                                 
                                 # Wrap DIDs in a dictionary for JSON display
                                 json_data = {
-                                    "Vehicle DID": vehicle[0].get('id', 'N/A'),
-                                    "Wallet DID": vehicle[1].get('id', 'N/A')
+                                    "Vehicle DID": g('id', 'N/A'),
+                                    "Wallet DID": wallet.get('id', 'N/A')
                                 }
                                 
                                 st.json(json_data)  # Display as JSON for better readability
 
                             # Service History
                             st.subheader("Service History")
-                            service_history = vehicle[0].get('serviceHistory', [])
-                            print(vehicle)
+                            service_history = g('serviceHistory', [])
+                            logger.debug("vehicle=%r", vehicle)
                             if service_history:
                                 history_data = []
                                 for service in service_history:
@@ -1324,7 +1544,7 @@ class IoVSSIPlatform:
 
                             # Available Services
                             st.subheader("Available Services")
-                            service_endpoints = vehicle[0].get('service_endpoints', [])
+                            service_endpoints = g('service_endpoints', [])
                             if service_endpoints:
                                 for endpoint in service_endpoints:
                                     st.write(f"**{endpoint.get('type', ['Service'])[0]}:** {endpoint.get('serviceEndpoint', 'N/A')}")
@@ -1335,27 +1555,35 @@ class IoVSSIPlatform:
 
         except Exception as e:
             st.error(f"Error loading vehicles: {str(e)}")
-            print(f"Detailed error: {e}")
+            logger.exception("Error loading vehicles")
 
 
     def _issue_credentials_page(self):
         """Page for issuing and managing verifiable credentials for vehicle ownership."""
         st.header("Issue Verifiable Credentials")
-        manus = []
         
-        # Get the list of registered users
-        users = self.blockchain_service.get_registered_users()
-        
-        # Filter users by type = 5 (assuming this is for vehicles)
-        for user in users:
-            if user["type"] == 5:  # Assuming type 5 is for Vehicles
-                user_info = {
-                    'name': user['name'],
-                    'did': user['did'],
-                    'address': user['address'],
-                    'type': user['type']  # This is the type ID
-                }
-                manus.append(user_info)
+        # Only rebuild the user lists when the chain has advanced
+        block_number = self.blockchain_service.web3.eth.block_number
+        cached = st.session_state.get('issue_credentials_users')
+        if cached and cached[0] == block_number:
+            users, manus = cached[1], cached[2]
+        else:
+            manus = []
+            
+            # Get the list of registered users
+            users = self.blockchain_service.get_registered_users()
+            
+            # Filter users by type = 5 (assuming this is for vehicles)
+            for user in users:
+                if user["type"] == 5:  # Assuming type 5 is for Vehicles
+                    user_info = {
+                        'name': user['name'],
+                        'did': user['did'],
+                        'address': user['address'],
+                        'type': user['type']  # This is the type ID
+                    }
+                    manus.append(user_info)
+            st.session_state.issue_credentials_users = (block_number, users, manus)
 
         # Check if there are any registered vehicles
         if not manus:
@@ -1370,7 +1598,7 @@ class IoVSSIPlatform:
         )
         car_did = selected_user[1]['did']
         # Get all registered vehicles owned by the selected user
-        all_vehicles = self.did_service.get_user_vehicles(selected_user[1]['did'])  # Use DID from selected user
+        all_vehicles = _cached_user_vehicles(self.did_service, selected_user[1]['did'])  # Use DID from selected user
        
         if not all_vehicles:
             st.warning("No registered vehicles found for the selected user.")
@@ -1379,10 +1607,11 @@ class IoVSSIPlatform:
         # Select credential issuer (current owner)
         st.subheader("Select Credential Issuer")
         
+        owner_dids = {v.get('owner_did', '') for v in all_vehicles}
         issuer_options = {
             f"{user['name']} ({user['did']})": user 
             for user in users 
-            if user['did'] in [v.get('owner_did','') for v in all_vehicles]  # Only show users who own vehicles
+            if user['did'] in owner_dids  # Only show users who own vehicles
         }
         
         if not issuer_options:
@@ -1391,9 +1620,10 @@ class IoVSSIPlatform:
 
         selected_issuer = st.selectbox("Select Owner (Issuer)", list(issuer_options.keys()))
         issuer = issuer_options[selected_issuer]
+        issuer_did = issuer['did']
 
         # Get issuer's vehicles
-        issuer_vehicles = [v for v in all_vehicles if v.get('owner_did') == issuer['did']]
+        issuer_vehicles = [v for v in all_vehicles if v.get('owner_did') == issuer_did]
         
         # Select vehicle to issue credential for
         st.subheader("Select Vehicle")
@@ -1413,7 +1643,7 @@ class IoVSSIPlatform:
         recipient_options = {
             f"{user['name']} ({user['did']})": user 
             for user in users 
-            if user['did'] != issuer['did']  # Exclude the issuer
+            if user['did'] != issuer_did  # Exclude the issuer
             and user['type'] != 5
         }
         
@@ -1475,8 +1705,7 @@ class IoVSSIPlatform:
                     "serviceType": service_type,
                     "validUntil": valid_until.isoformat()
                 }
-            print(car_did)
-            print(recipient['did'])
+            logger.debug("Issuing credential for vehicle %s to %s", car_did, recipient['did'])
             if st.form_submit_button("Issue Credential"):
                 try:
                     # Create the verifiable credential
@@ -1498,6 +1727,8 @@ class IoVSSIPlatform:
                         )
                         
                         if res:
+                            _cached_did_documents.clear()
+                            _cached_user_vehicles.clear()
                             st.success("Credential added to recipient's DID document!")
                             
                             # If this is a VehicleOwnership credential, update the vehicle's owner
@@ -1517,19 +1748,83 @@ class IoVSSIPlatform:
                 except Exception as e:
                     st.error(f"Error issuing credential: {e}")
 
+    def _searchable_select(self, label: str, items: list, format_item, key: str, item_key=None):
+        """
+        Selectbox that renders at most _SELECT_DISPLAY_MAX options. Longer
+        lists get a search box and only the first matches are offered.
+        
+        Args:
+            label: Selectbox label
+            items: Candidate items
+            format_item: Function returning the display label of an item
+            key: Widget key prefix
+            item_key: Optional function returning a stable string id of an item
+                (e.g. its DID); when given, the widget state holds that id so the
+                selection survives the list being reordered or extended
+            
+        Returns:
+            The selected item, or None if nothing matches
+        """
+        # Labels are built once; the selectbox works on indices into them
+        labels = [format_item(item) for item in items]
+        indices = range(len(items))
+        if len(items) > _SELECT_DISPLAY_MAX:
+            query = st.text_input(f"Search {label.lower()}", key=f"{key}_query").strip().lower()
+            indices = [i for i, text in enumerate(labels) if query in text.lower()]
+            if len(indices) > _SELECT_DISPLAY_MAX:
+                st.caption(f"Showing first {_SELECT_DISPLAY_MAX} of {len(indices)} matches; refine the search to narrow down.")
+                indices = indices[:_SELECT_DISPLAY_MAX]
+        
+        if not indices:
+            st.info("No matches")
+            return None
+        if item_key is None:
+            index = st.selectbox(label, options=indices, format_func=labels.__getitem__, key=key)
+            return items[index]
+        
+        index_by_key = {item_key(items[i]): i for i in indices}
+        selected = st.selectbox(
+            label,
+            options=list(index_by_key),
+            format_func=lambda item_id: labels[index_by_key[item_id]],
+            key=key
+        )
+        return items[index_by_key[selected]]
+
+    def _get_registered_users(self) -> list:
+        """Get registered users through the shared short-lived cache."""
+        return _cached_registered_users(self.blockchain_service)
+
+    def _get_registered_users_of_types(self, *type_ids: int) -> list:
+        """Get registered users whose type ID is one of type_ids, through the shared cache."""
+        return _cached_registered_users_of_types(self.blockchain_service, type_ids)
+
+    def _get_user_vehicles(self, did: str) -> list:
+        """Get a DID's vehicles through the shared short-lived cache."""
+        return _cached_user_vehicles(self.did_service, did)
+
+    def _invalidate_user_caches(self):
+        """Drop cached users and vehicles after a write that changes them."""
+        _cached_registered_users.clear()
+        _cached_registered_users_of_types.clear()
+        _cached_user_vehicles.clear()
+
+    def _get_users_batch(self, addresses) -> list:
+        """Get the on-chain user tuples for the given addresses in one batched read."""
+        return _cached_users_batch(self.blockchain_service, tuple(addresses))
+
     def _get_all_users(self):
         """Get all registered users with their DIDs and vehicles."""
         try:
             # Get all registered addresses
-            registered_addresses = self.blockchain_service.contract.functions.getRegisteredAddresses().call()
+            registered_addresses = self.blockchain_service.get_registered_addresses()
             
             # Get all users with their DIDs and vehicles
             users = []
-            for address in registered_addresses:
-                user = self.blockchain_service.contract.functions.users(address).call()
+            for address, user in zip(registered_addresses, self._get_users_batch(registered_addresses)):
                 if user[3]:  # If user has a DID
                     user_info = {
-                        'name': user[0],
+                        'name': user[1],
                         'did': user[3],
                         'address': address,
                         'type': user[2]  # This is the type ID
@@ -1538,11 +1833,21 @@ class IoVSSIPlatform:
             
             return users
         except Exception as e:
-            print(f"Error getting users: {str(e)}")
+            logger.exception("Error getting users")
             return []
 
+@st.cache_resource
+def _get_platform() -> IoVSSIPlatform:
+    """
+    Platform and its services, created once per server process
+    
+    Every browser session uses the same instance, so per-session state belongs in st.session_state.
+    DIDService sends from per-call account services and WalletService locks its shared stores.
+    """
+    return IoVSSIPlatform()
+
 def main():
-    platform = IoVSSIPlatform()
+    platform = _get_platform()
     platform.run()
 
 if __name__ == "__main__":
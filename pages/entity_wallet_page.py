@@ -0,0 +1,4 @@
+from wallet.entity_wallet import main
+
+# Served as a page of the main Streamlit app so both UIs share one interpreter
+main()
@@ -1,5 +1,10 @@
+from collections import Counter
 import streamlit as st
 
+def _go_to(page: str):
+    """Button callback: switch the sidebar navigation before the next run starts."""
+    st.session_state['page'] = page
+
 def HomePage(self):
     # Title with custom styling
     st.markdown("""
@@ -45,13 +50,18 @@ def HomePage(self):
     """, unsafe_allow_html=True)
 
     try:
-        registered_addresses = self.blockchain_service.contract.functions.getRegisteredAddresses().call()
-        total_users = len(registered_addresses)
-        
-        # Get user type counts
-        type_counts = self._count_user_types(registered_addresses)
+        # One batched read of all users; everything below is derived locally
+        users = self._get_all_users()
+        total_users = len(users)
         
-        # Count vehicles (using blockchain directly instead of did_service)
+        # Get user type counts in one pass over the users
+        by_type = Counter(user['type'] for user in users)
+        type_counts = {
+            'RSU': by_type[3],
+            'Insurance': by_type[2],
+            'Companies': by_type[1] + by_type[4],  # Mechanics and manufacturers
+            'Vehicles': by_type[5]
+        }
         total_vehicles = type_counts['Vehicles']
         
         # First row of statistics
@@ -114,22 +124,19 @@ def HomePage(self):
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("➕ Register New User", use_container_width=True):
-                st.session_state['page'] = 'Create DID'
-                st.experimental_rerun()
+            st.button("➕ Register New User", use_container_width=True,
+                      on_click=_go_to, args=('Create DID',))
                 
         with col2:
-            if st.button("🚗 Register New Vehicle", use_container_width=True):
-                st.session_state['page'] = 'Register Vehicle Page'
-                st.experimental_rerun()
+            st.button("🚗 Register New Vehicle", use_container_width=True,
+                      on_click=_go_to, args=('Register Vehicle',))
 
         # Recent activity
         st.markdown("### Recent Activity")
         if total_users > 0:
-            recent_users = [self.blockchain_service.contract.functions.users(addr).call() 
-                            for addr in registered_addresses[-3:]]  # Last 3 users
+            recent_users = users[-3:]  # Last 3 users
             for user in reversed(recent_users):
-                st.markdown(f"- 🔷 New {self._get_user_type_name(user[2])}: {user[1]}")
+                st.markdown(f"- 🔷 New {self._get_user_type_name(user['type'])}: {user['name']}")
         else:
             st.info("No recent activity")
 
@@ -1,42 +1,35 @@
 import streamlit as st
 
+# User types allowed to inspect vehicles: Mechanic (1) and Insurance Provider (2)
+INSPECTOR_TYPES = (1, 2)
+
 def VehicleInspectionPage(self):
     """Vehicle inspection page"""
     st.title("Vehicle Inspection")
-    users = []
-    # Get all registered addresses
-    all_users = self.blockchain_service.get_registered_users()
-    for user in all_users:
-        if user["type"] == [1,2]:  # Assuming type 5 is for Vehicles
-            user_info = {
-                'name': user['name'],
-                'did': user['did'],
-                'address': user['address'],
-                'type': user['type']  # This is the type ID
-            }
-            users.append(user_info)
+    users = self._get_registered_users_of_types(*INSPECTOR_TYPES)
     
     # User selection
-    selected_user = st.selectbox(
+    selected_user = self._searchable_select(
         "Select User",
-        options=[f"{user['name']} ({user['did']})" for user in users],
-        format_func=lambda x: x.split(' (')[0]
+        users,
+        lambda user: user['name'],
+        key="inspection_user",
+        item_key=lambda user: user['did']
     )
     
     if selected_user:
-        user_did = selected_user.split(' (')[1].rstrip(')')
-        user_vehicles = self.did_service.get_user_vehicles(user_did)
+        user_did = selected_user['did']
+        user_vehicles = self._get_user_vehicles(user_did)
         
         if user_vehicles:
-            selected_vehicle = st.selectbox(
+            vehicle_info = self._searchable_select(
                 "Select Vehicle",
-                options=[f"{v['make']} {v['model']} ({v['vin']})" for v in user_vehicles],
-                format_func=lambda x: x.split(' (')[0]
+                user_vehicles,
+                lambda v: f"{v['make']} {v['model']}",
+                key="inspection_vehicle"
             )
             
-            if selected_vehicle:
-                vehicle_vin = selected_vehicle.split('(')[1].rstrip(')')
-                vehicle_info = next(v for v in user_vehicles if v['vin'] == vehicle_vin)
+            if vehicle_info:
                 
                 st.subheader("Vehicle Information")
                 st.json({
@@ -72,6 +65,7 @@ def VehicleInspectionPage(self):
                         )
                         
                         if credential:
+                            self._invalidate_user_caches()
                             st.success("Inspection record created successfully!")
                             st.json(inspection_data)
                         else:
@@ -5,23 +5,24 @@ def RenderWalletUI(self):
     st.subheader("Wallet Configuration")
     
     # Get list of registered users
-    users = self.blockchain_service.get_registered_users()
+    users = self._get_registered_users()
     if not users:
         st.error("No registered users found. Please register a user first.")
         return
     
     # User selection
-    user_options = {f"{user['name']} ({user['did']})": user for user in users}
-    selected_user = st.selectbox("Select User", list(user_options.keys()))
+    user = self._searchable_select(
+        "Select User",
+        users,
+        lambda user: f"{user['name']} ({user['did']})",
+        key="wallet_user",
+        item_key=lambda user: user['did']
+    )
     
-    if selected_user:
-        user = user_options[selected_user]
+    if user:
         
         # Create wallet if it doesn't exist
-        if not self.wallet_service.get_wallet(user['did']):
-            self.wallet_service.create_wallet(user['did'], user['type'])
-        
-        wallet = self.wallet_service.get_wallet(user['did'])
+        wallet = self.wallet_service.get_or_create_wallet(user['did'], user['type'])
         if not wallet:
             st.error("Failed to load wallet")
             return
@@ -33,38 +34,45 @@ def RenderWalletUI(self):
         # Data sharing policies
         st.subheader("Data Sharing Policies")
         
-        for data_type, policy in wallet['policies'].items():
-            with st.expander(f"{data_type.replace('_', ' ').title()} Policy"):
-                # Share with selection
-                share_with = st.multiselect(
-                    f"Share {data_type} with:",
-                    ['emergency', 'roadside_unit', 'insurance', 'service', 'vehicle'],
-                    default=policy['share_with']
-                )
-                
-                # Consent requirement with a unique key
-                requires_consent = st.checkbox(
-                    f"Require consent for {data_type}",
-                    value=policy['requires_consent'],
-                    key=f"requires_consent_{data_type}"  # Unique key using data_type
-                )
-                
-                # Emergency auto-share with a unique key
-                auto_share_emergency = st.checkbox(
-                    f"Auto-share in emergencies",
-                    value=policy['auto_share_emergency'],
-                    key=f"auto_share_emergency_{data_type}"  # Unique key using data_type
-                )
-                
-                # Update policy if changed
-                if (share_with != policy['share_with'] or 
-                    requires_consent != policy['requires_consent'] or 
-                    auto_share_emergency != policy['auto_share_emergency']):
-                    self.wallet_service.update_policy(wallet['did'], data_type, {
-                        'share_with': share_with,
-                        'requires_consent': requires_consent,
-                        'auto_share_emergency': auto_share_emergency
-                    })
+        # Only the selected policy's editor is mounted on each rerun
+        data_type = st.selectbox(
+            "Data type",
+            list(wallet['policies']),
+            format_func=lambda data_type: f"{data_type.replace('_', ' ').title()} Policy",
+            key=f"wallet_policy_{wallet['did']}"
+        )
+        if data_type:
+            policy = wallet['policies'][data_type]
+            # Share with selection
+            share_with = st.multiselect(
+                f"Share {data_type} with:",
+                ['emergency', 'roadside_unit', 'insurance', 'service', 'vehicle'],
+                default=policy['share_with']
+            )
+            
+            # Consent requirement with a unique key
+            requires_consent = st.checkbox(
+                f"Require consent for {data_type}",
+                value=policy['requires_consent'],
+                key=f"requires_consent_{data_type}"  # Unique key using data_type
+            )
+            
+            # Emergency auto-share with a unique key
+            auto_share_emergency = st.checkbox(
+                f"Auto-share in emergencies",
+                value=policy['auto_share_emergency'],
+                key=f"auto_share_emergency_{data_type}"  # Unique key using data_type
+            )
+            
+            # Update policy if changed
+            if (share_with != policy['share_with'] or 
+                requires_consent != policy['requires_consent'] or 
+                auto_share_emergency != policy['auto_share_emergency']):
+                self.wallet_service.update_policy(wallet['did'], data_type, {
+                    'share_with': share_with,
+                    'requires_consent': requires_consent,
+                    'auto_share_emergency': auto_share_emergency
+                })
         
         # Show shared data
         if 'shared_data' in wallet and wallet['shared_data']:
@@ -10,15 +10,8 @@ from pathlib import Path
 #     env["PYTHONPATH"] = str(project_root)
 #     subprocess.Popen([sys.executable, "api/server.py"], env=env)
 
-def run_wallet_interface():
-    """Run the wallet interface"""
-    print("Starting wallet interface...")
-    env = os.environ.copy()
-    env["PYTHONPATH"] = str(project_root)
-    subprocess.Popen([sys.executable, "-m", "streamlit", "run", "wallet/entity_wallet.py"], env=env)
-
 def run_blockchain_interface():
-    """Run the blockchain explorer interface"""
+    """Run the blockchain explorer interface; the entity wallet is served as one of its pages"""
     print("Starting blockchain explorer...")
     env = os.environ.copy()
     env["PYTHONPATH"] = str(project_root)
@@ -35,11 +28,10 @@ if __name__ == "__main__":
 
     # Start all components
     # run_api_server()
-    run_wallet_interface()
     run_blockchain_interface()
 
     print("\nAll components started!")
     print("Access the interfaces at:")
     print("- API Documentation: http://localhost:8000/docs")
-    print("- Entity Wallet: http://localhost:8501")
-    print("- Blockchain Explorer: http://localhost:8502")
+    print("- Blockchain Explorer: http://localhost:8501")
+    print("- Entity Wallet: http://localhost:8501/entity_wallet_page")
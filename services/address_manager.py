@@ -1,127 +1,179 @@
-from web3 import Web3
+import logging
 import os
-import json
-from typing import Optional, Tuple, Dict
+import threading
+from collections import deque
+from typing import Optional, Tuple
 from services.blockchain_service import BlockchainService
+from services.bootstrap import get_blockchain_service
+from services.serialization import dumps, loads
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Journal size after which the next change writes a full snapshot instead
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+
+def _load_test_accounts() -> Tuple[Tuple[str, str], ...]:
+    """
+    Read the Ganache test accounts from GANACHE_ACCOUNT_<i>_ADDR / GANACHE_ACCOUNT_<i>_KEY,
+    starting at index 0 and stopping at the first missing pair.
+    """
+    accounts = []
+    while True:
+        address = os.getenv(f'GANACHE_ACCOUNT_{len(accounts)}_ADDR')
+        private_key = os.getenv(f'GANACHE_ACCOUNT_{len(accounts)}_KEY')
+        if not address or not private_key:
+            break
+        accounts.append((address, private_key))
+    return tuple(accounts)
+
+# Ganache test accounts as (address, private_key) pairs, read once at import
+_TEST_ACCOUNTS: Tuple[Tuple[str, str], ...] = _load_test_accounts()
 
 class AddressManager:
     def __init__(self, blockchain_service: BlockchainService = None):
         """Initialize address manager"""
         # Initialize blockchain service with default account
-        self.blockchain_service = blockchain_service or BlockchainService()
+        self.blockchain_service = blockchain_service or get_blockchain_service()
         self.addresses_file = os.path.join(
             os.path.dirname(os.path.dirname(__file__)),
             'data',
             'addresses.json'
         )
+        # Assignments and releases since the last snapshot, one JSON event per line
+        self.journal_file = self.addresses_file + '.log'
+        self._journal = None
+        self._journal_size = 0
         self.addresses = None
+        self._used_addr_set = None
+        self._by_address = {}
+        self._dirty = False
+        # Shared by every session and API worker; held across assignment, release, reload and save
+        self._lock = threading.RLock()
         self._load_addresses()
+        self._save_addresses()
 
     def _load_addresses(self):
         """Load addresses from Ganache and manage them"""
-        os.makedirs(os.path.dirname(self.addresses_file), exist_ok=True)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.addresses_file), exist_ok=True)
         
-        try:
-            # Connect to Ganache
-            w3 = Web3(Web3.HTTPProvider('http://127.0.0.1:7545'))
-            
-            # Initialize addresses structure
-            self.addresses = {
-                'available': [],
-                'used': {}
-            }
-            
-            # Load existing used addresses from file if it exists
-            if os.path.exists(self.addresses_file):
-                with open(self.addresses_file, 'r') as f:
-                    stored_data = json.load(f)
-                    self.addresses['used'] = stored_data.get('used', {})
-            
-            # Ganache test accounts and their private keys
-            test_accounts = [
-                {#0
-                    'address': '0x54b99Dc1C2f505CF0fAA465eCdA78c872b3749cC',
-                    'private_key': '0xd09777239f86e807e5fbd5db02fe4cff51dcbc77b598dfcea6c62aea4117acd8'
-                },
-                {#1
-                    'address': '0xF86C6fD8d11Bd7a5C4F19301BA6ab4Da0B69B206',
-                    'private_key': '0xf30129e3a83a00cc00ffd35f43e6736102a64996074a01ea92abe12767e5fa4f'
-                },
-                {#2
-                    'address': '0x53799B8c448521A6bA35CC4C78DD66dD804ce8a8',
-                    'private_key': '0x319b7d2ee2f737787132c25e23a165467ae9f33e894bd27c80a840506b38014c'
-                },
-                {#3
-                    'address': '0xdc2190cF7895688D2FEE20716cB7dD6dEBB30b56',
-                    'private_key': '0x17fb49e5ec17ca0be9600cc9bc20fe953620c98cd50ddb3ca64296a158f5e089'
-                },
-                {#4
-                    'address': '0x71980E1D5E4f176ADFE7bd90b968045B389274c7',
-                    'private_key': '0x0350589197961a95ce7b2f20c6572e2935e2d1b71ea148cb8db115bd529dd0cf'
-                },
-                {#5
-                    'address': '0x1A23AD04C94FEEe69d12b9F95b1F83fff0B6EB23',
-                    'private_key': '0xe99d4ee80bde64c73c7677e8eea1290f3bf8141de6d1cbe6554f4ff22900b7cc'
-                },
-                {#6
-                    'address': '0xA6b36a8E07e04F1295E609bc523fb9bC21900Bf1',
-                    'private_key': '0xf3b9e5106823ff4393427367423ced5d74c8e8ffed38266d16808502e99b123b'
-                },
-                {# 7
-                    'address': '0x44E4947b4E64DB6AE0697F7fc479f0BC7ec70CC7',
-                    'private_key': '0xe1d9daa75524b61b8abd701ccdc9d16b8bea6397ae9bf6df0fe91d90f4841516'
-                },
-                {# 8
-                    'address': '0xCDc10fDFBfF34Cb71180857D89756639799Ba78d',
-                    'private_key': '0xb69bcb1262256040a2e1f90c31245a0d89664e20402bd8a7595c5ff7b01d0c07'
-                },
-                {# 9
-                    'address': '0xF8a4c9d195B8Fcc4d453daB43afF54ba93d36311',
-                    'private_key': '0x5edc5c96c4cd7e3e3378664d1380063df70fee8d539356650d2dd9b8262bad47'
+            try:
+                # Load existing used addresses from file on first load; afterwards
+                # the in-memory map is authoritative since every change is saved
+                if self._used_addr_set is None:
+                    used = {}
+                    if os.path.exists(self.addresses_file):
+                        with open(self.addresses_file, 'rb') as f:
+                            stored_data = loads(f.read())
+                            used = stored_data.get('used', {})
+                    self._replay_journal(used)
+                    self._used_addr_set = {addr['address'] for addr in used.values()}
+                else:
+                    used = self.addresses['used']
+
+                # Initialize addresses structure
+                self.addresses = {
+                    'available': deque(),
+                    'used': used
                 }
-            ]
 
-            # Get set of used addresses
-            used_addresses = set(addr['address'] for addr in self.addresses['used'].values())
-            
-            # Add unused test accounts to available pool
-            for account in test_accounts:
-                if account['address'] not in used_addresses:
-                    # Get account balance
-                    balance = w3.eth.get_balance(account['address'])
+                # Add unused, funded and unregistered test accounts to available pool
+                candidates = [account for account in _TEST_ACCOUNTS if account[0] not in self._used_addr_set]
+                states = self.blockchain_service.get_account_states([address for address, _ in candidates])
+                for (address, private_key), (balance, is_registered) in zip(candidates, states):
                     # Only add accounts with balance
-                    if balance > 0:
-                        # Check if address is already registered in the smart contract
-                        try:
-                            is_registered = self.blockchain_service.is_address_registered(account['address'])
-                            if not is_registered:
-                                self.addresses['available'].append({
-                                    'address': account['address'],
-                                    'private_key': account['private_key']
-                                })
-                                print(f"Added Ganache account {account['address']} to available addresses")
-                            else:
-                                print(f"Skipping registered address {account['address']}")
-                        except Exception as e:
-                            print(f"Error checking address {account['address']}: {e}")
+                    if balance <= 0:
+                        continue
+                    if not is_registered:
+                        self.addresses['available'].append({
+                            'address': address,
+                            'private_key': private_key
+                        })
+                        logger.debug("Added Ganache account %s to available addresses", address)
+                    else:
+                        logger.debug("Skipping registered address %s", address)
             
-            # Save the current state
-            self._save_addresses()
+                # Index private keys by lowercased address for O(1) lookups
+                self._by_address = {
+                    addr['address'].lower(): addr['private_key']
+                    for addr in (*self.addresses['available'], *used.values())
+                }
+
+                # Mark the current state for saving
+                self._dirty = True
             
-            print(f"Loaded {len(self.addresses['available'])} available addresses")
+                logger.info("Loaded %s available addresses", len(self.addresses['available']))
             
-        except Exception as e:
-            print(f"Error in _load_addresses: {e}")
-            self.addresses = {
-                'available': [],
-                'used': {}
-            }
-            self._save_addresses()
+            except Exception as e:
+                logger.error("Error in _load_addresses: %s", e)
+                self.addresses = {
+                    'available': deque(),
+                    'used': {}
+                }
+                self._used_addr_set = set()
+                self._by_address = {}
+                self._dirty = True
+
+    def _replay_journal(self, used: dict):
+        """Apply the journaled assignments and releases on top of a loaded snapshot"""
+        if not os.path.exists(self.journal_file):
+            return
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    event = loads(line)
+                except ValueError:
+                    # A torn last line from an interrupted append
+                    break
+                if event['op'] == 'assign':
+                    used[event['user']] = {
+                        'address': event['address'],
+                        'private_key': event['private_key']
+                    }
+                elif event['op'] == 'release':
+                    used.pop(event['user'], None)
+
+    def _append_journal(self, event: dict):
+        """Record a change to the used addresses as one journal line"""
+        if self._dirty:
+            # A full snapshot is pending and will include this change
+            return
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'ab')
+            self._journal_size = self._journal.tell()
+        line = dumps(event) + b'\n'
+        self._journal.write(line)
+        self._journal.flush()
+        self._journal_size += len(line)
+        if self._journal_size > JOURNAL_COMPACT_BYTES:
+            self._dirty = True
 
     def _save_addresses(self):
-        """Save the addresses to the JSON file"""
-        with open(self.addresses_file, 'w') as f:
-            json.dump(self.addresses, f, indent=4)
+        """Save the addresses to the JSON file if they changed since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dumps({
+                'available': list(self.addresses['available']),
+                'used': self.addresses['used']
+            }, indent=True)
+            # Write to a temporary file and swap it in so a crash never leaves a truncated file
+            tmp_file = self.addresses_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, self.addresses_file)
+            # The snapshot now covers every journaled change; replaying them again is harmless
+            # if the process dies before the truncation
+            if self._journal is not None:
+                self._journal.truncate(0)
+                self._journal_size = 0
+            elif os.path.exists(self.journal_file):
+                os.truncate(self.journal_file, 0)
+            self._dirty = False
 
     def get_address(self, user_id: str) -> Optional[Tuple[str, str]]:
         """
@@ -134,62 +186,77 @@ class AddressManager:
         Returns:
             Tuple[str, str]: (address, private_key) if available, None if no addresses left
         """
-        # Check if user already has an address
-        if user_id in self.addresses['used']:
-            return (
-                self.addresses['used'][user_id]['address'],
-                self.addresses['used'][user_id]['private_key']
-            )
+        with self._lock:
+            # Check if user already has an address
+            if user_id in self.addresses['used']:
+                return (
+                    self.addresses['used'][user_id]['address'],
+                    self.addresses['used'][user_id]['private_key']
+                )
         
-        # Get a new address if available
-        if self.addresses['available']:
-            address_data = self.addresses['available'].pop(0)
-            self.addresses['used'][user_id] = address_data
-            self._save_addresses()
-            return (address_data['address'], address_data['private_key'])
+            # If no addresses available, try to reload from Ganache
+            if not self.addresses['available']:
+                self._load_addresses()
         
-        # If no addresses available, try to reload from Ganache
-        self._load_addresses()
+            address_info = None
+            if self.addresses['available']:
+                address_data = self.addresses['available'].popleft()
+                self.addresses['used'][user_id] = address_data
+                self._used_addr_set.add(address_data['address'])
+                self._append_journal({
+                    'op': 'assign',
+                    'user': user_id,
+                    'address': address_data['address'],
+                    'private_key': address_data['private_key']
+                })
+                address_info = (address_data['address'], address_data['private_key'])
         
-        # Try again after reload
-        if self.addresses['available']:
-            address_data = self.addresses['available'].pop(0)
-            self.addresses['used'][user_id] = address_data
             self._save_addresses()
-            return (address_data['address'], address_data['private_key'])
-        
-        return None
+            return address_info
 
     def get_private_key(self, address: str) -> Optional[str]:
         """Get private key for a given address"""
-        try:
-            # Check used addresses
-            for user_id, addr_data in self.addresses['used'].items():
-                if addr_data['address'].lower() == address.lower():
-                    return addr_data['private_key']
-            
-            # Check available addresses
-            for addr_data in self.addresses['available']:
-                if addr_data['address'].lower() == address.lower():
-                    return addr_data['private_key']
-                    
-            return None
-        except Exception as e:
-            print(f"Error getting private key: {e}")
-            return None
+        return self._by_address.get(address.lower())
 
     def release_address(self, user_id: str):
         """Release an address back to the available pool"""
-        if user_id in self.addresses['used']:
-            address_data = self.addresses['used'].pop(user_id)
-            # Check if address is registered before adding back to pool
-            try:
-                is_registered = self.blockchain_service.is_address_registered(address_data['address'])
-                if not is_registered:
-                    self.addresses['available'].append(address_data)
-                    print(f"Released address {address_data['address']} back to available pool")
-                else:
-                    print(f"Not releasing registered address {address_data['address']}")
-            except Exception as e:
-                print(f"Error checking address registration: {e}")
-            self._save_addresses()
+        with self._lock:
+            if user_id in self.addresses['used']:
+                address_data = self.addresses['used'].pop(user_id)
+                self._used_addr_set.discard(address_data['address'])
+                # Check if address is registered before adding back to pool
+                try:
+                    is_registered = self.blockchain_service.is_address_registered(address_data['address'])
+                    if not is_registered:
+                        self.addresses['available'].append(address_data)
+                        logger.debug("Released address %s back to available pool", address_data['address'])
+                    else:
+                        self._by_address.pop(address_data['address'].lower(), None)
+                        logger.debug("Not releasing registered address %s", address_data['address'])
+                except Exception as e:
+                    self._by_address.pop(address_data['address'].lower(), None)
+                    logger.error("Error checking address registration: %s", e)
+                self._append_journal({'op': 'release', 'user': user_id})
+                self._save_addresses()
+
+
+_address_manager: Optional[AddressManager] = None
+_address_manager_lock = threading.Lock()
+
+
+def get_address_manager(blockchain_service: BlockchainService = None) -> AddressManager:
+    """
+    Get the process-wide address manager, creating it on first use.
+    
+    The address pool is process state backed by a single file, so every
+    service shares one instance instead of reloading it from Ganache.
+    
+    Args:
+        blockchain_service: Service used if the manager has not been created yet
+    """
+    global _address_manager
+    if _address_manager is None:
+        with _address_manager_lock:
+            if _address_manager is None:
+                _address_manager = AddressManager(blockchain_service=blockchain_service)
+    return _address_manager
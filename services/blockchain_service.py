@@ -1,9 +1,27 @@
 from web3 import Web3
+from eth_abi import decode as abi_decode, encode as abi_encode
+from eth_account import Account
+from eth_utils import function_signature_to_4byte_selector
+import copy
 import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config.settings import Settings, BlockchainConfig
-from typing import List, Dict, Any, Optional, Union, Tuple
+from services.payload_store import is_payload_ref, load_payload
+from services.serialization import dumps, loads
+from typing import List, Dict, Any, Optional, Union, Tuple, Callable, Iterator
 from enum import Enum, auto
 
+logger = logging.getLogger(__name__)
+
 class UserType(Enum):
     """
     Enum to map user types to contract's uint8 enum values
@@ -16,16 +34,189 @@ class UserType(Enum):
     VEHICLE_MANUFACTURER = 4
     CAR = 5
 
+# Contract enum value for each accepted spelling of a user type, matched after upper()
+_USER_TYPE_LOOKUP = {name: member.value for name, member in UserType.__members__.items()}
+_USER_TYPE_LOOKUP.update({name.replace('_', ' '): value for name, value in _USER_TYPE_LOOKUP.items()})
+
+# Display names indexed by UserType value
+_USER_TYPE_NAMES = ("Individual", "Mechanic", "Insurance Provider", "Roadside Unit", "Vehicle Manufacturer", "Car")
+
+# Minimal Multicall3 ABI used to batch read-only contract calls
+MULTICALL3_ABI = [{
+    "inputs": [{
+        "components": [
+            {"internalType": "address", "name": "target", "type": "address"},
+            {"internalType": "bytes", "name": "callData", "type": "bytes"}
+        ],
+        "internalType": "struct Multicall3.Call[]",
+        "name": "calls",
+        "type": "tuple[]"
+    }],
+    "name": "aggregate",
+    "outputs": [
+        {"internalType": "uint256", "name": "blockNumber", "type": "uint256"},
+        {"internalType": "bytes[]", "name": "returnData", "type": "bytes[]"}
+    ],
+    "stateMutability": "payable",
+    "type": "function"
+}, {
+    "inputs": [{"internalType": "address", "name": "addr", "type": "address"}],
+    "name": "getEthBalance",
+    "outputs": [{"internalType": "uint256", "name": "balance", "type": "uint256"}],
+    "stateMutability": "view",
+    "type": "function"
+}]
+
+# Hot read-only calls made through raw eth_call: name -> (selector, argument types, return types)
+_RAW_CALLS: Dict[str, Tuple[bytes, Tuple[str, ...], Tuple[str, ...]]] = {
+    'users': (
+        function_signature_to_4byte_selector('users(address)'),
+        ('address',),
+        ('address', 'string', 'uint8', 'string', 'string', 'bool', 'uint256')
+    ),
+    'isValidDID': (function_signature_to_4byte_selector('isValidDID(string)'), ('string',), ('bool',)),
+    'didToAddress': (function_signature_to_4byte_selector('didToAddress(string)'), ('string',), ('address',)),
+    'getRegisteredAddresses': (function_signature_to_4byte_selector('getRegisteredAddresses()'), (), ('address[]',)),
+}
+
+# Connection pool size, and (connect, read) timeout in seconds for every RPC
+HTTP_POOL_SIZE = 32
+RPC_TIMEOUT = (3.05, 30)
+
+_session: Optional[requests.Session] = None
+
+def _http_session() -> requests.Session:
+    """Pooled keep-alive session shared by the Web3 provider and raw JSON-RPC batches."""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        # Only connection failures are retried for JSON-RPC POSTs, so a sent transaction is never replayed
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.1)
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session = session
+    return _session
+
+def _http_provider() -> Web3.HTTPProvider:
+    """HTTP provider backed by the pooled session, so RPCs reuse connections."""
+    return Web3.HTTPProvider(
+        Settings.BLOCKCHAIN_URL,
+        request_kwargs={'timeout': RPC_TIMEOUT},
+        session=_http_session()
+    )
+
+# Short-lived cache of read-only contract calls, shared by every service instance
+# and cleared whenever a transaction is sent or mined
+READ_CACHE_TTL = 15
+READ_CACHE_MAX_ENTRIES = 1024
+_read_cache: "OrderedDict[tuple, Tuple[float, Any]]" = OrderedDict()
+_read_cache_lock = threading.Lock()
+
+# VIN of each vehicle DID, confirmed against the on-chain vehicle record; registrations are permanent
+_vin_by_did: Dict[str, str] = {}
+
+# Next nonce per sending account, handed out locally so each send skips eth_getTransactionCount
+_nonces: Dict[str, int] = {}
+_nonce_lock = threading.Lock()
+
+# Registered addresses per user type, extended incrementally from UserRegistered events
+_type_index: Dict[str, Any] = {'next_block': None, 'expires': 0.0, 'generation': 0, 'by_type': {}}
+_type_index_lock = threading.Lock()
+
+# Fee parameters shared by every sending account, refreshed about once per block
+FEE_CACHE_TTL = 12
+LEGACY_GAS_PRICE = Web3.to_wei(20, 'gwei')
+MIN_PRIORITY_FEE = Web3.to_wei(1, 'gwei')
+_fee_cache: Dict[str, Any] = {'expires': 0.0, 'fees': None}
+_fee_lock = threading.Lock()
+
+# Worker pool that waits on several transaction receipts at once
+_receipt_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="receipts")
+
+def _decode_payloads_bulk(raw_payloads: list) -> list:
+    """
+    Decode the JSON-object payloads among raw_payloads with a single parse
+    
+    Payloads that are not inline JSON objects decode to None. If the combined
+    array does not parse cleanly, each payload is decoded on its own instead.
+    """
+    parts = [
+        bytes(payload) if isinstance(payload, (bytes, bytearray)) and payload[:1] == b'{' else b'null'
+        for payload in raw_payloads
+    ]
+    try:
+        decoded = loads(b'[' + b','.join(parts) + b']')
+        if len(decoded) == len(parts):
+            return decoded
+    except ValueError:
+        pass
+    
+    results = []
+    for part in parts:
+        try:
+            results.append(loads(part))
+        except ValueError:
+            results.append(None)
+    return results
+
+def _document_json(document: Union[str, Dict]) -> str:
+    """JSON string for a DID document given either as a string or as a dict."""
+    if isinstance(document, str):
+        return document
+    return dumps(document).decode()
+
+@lru_cache(maxsize=64)
+def _local_account(private_key: str):
+    """Parse a private key once; services for the same account share the signing object."""
+    return Account.from_key(private_key)
+
+def _invalidate_read_cache():
+    """Drop every cached contract read after a state-changing transaction."""
+    with _read_cache_lock:
+        _read_cache.clear()
+        # A type index refresh already in flight may have read its logs before this transaction;
+        # bumping the generation stops it from marking the index fresh when it finishes
+        _type_index['generation'] += 1
+        _type_index['expires'] = 0.0
+
 class BlockchainService:
-    def __init__(self, account=None, private_key=None):
-        self.web3 = Web3(Web3.HTTPProvider(Settings.BLOCKCHAIN_URL))
+    def __init__(self, account=None, private_key=None, web3: Web3 = None):
+        # Services for other accounts can reuse an existing client instead of opening a new provider
+        self.web3 = web3 or Web3(_http_provider())
         self.contract_address = self.web3.to_checksum_address(Settings.CONTRACT_ADDRESS)
         self.contract = self.web3.eth.contract(
             address=self.contract_address,
             abi=BlockchainConfig.ABI
         )
+        self._functions = self.contract.functions
         self.account = account if account else Settings.ACCOUNT
         self.private_key = private_key if private_key else Settings.PRIVATE_KEY
+        self._acct = _local_account(self.private_key) if self.private_key else None
+        self._multicall = None
+        self._multicall_checked = False
+
+    def for_account(self, account: str, private_key: str) -> "BlockchainService":
+        """
+        Get a service that sends from another account
+        
+        The returned service shares this one's Web3 client and contract binding,
+        so no provider or ABI setup is repeated. This instance is left unchanged,
+        which keeps a shared service safe to use from several threads.
+        """
+        service = copy.copy(self)
+        service.account = account
+        service.private_key = private_key
+        service._acct = _local_account(private_key) if private_key else None
+        return service
+
+    @contextmanager
+    def use_account(self, account: str, private_key: str):
+        """Context manager yielding for_account(account, private_key)"""
+        yield self.for_account(account, private_key)
 
     def _build_and_send_transaction(self, function_call, gas: int = 6000000) -> str:
         """
@@ -39,52 +230,186 @@ class BlockchainService:
             Transaction hash as hex string
         """
         try:
-            print(f"Building transaction with account: {self.account}")
-            nonce = self.web3.eth.get_transaction_count(self.account)
+            logger.debug("Building transaction with account: %s", self.account)
+            nonce = self._next_nonce()
             
             transaction = function_call.build_transaction({
                 'from': self.account,
                 'gas': gas,
-                'gasPrice': self.web3.to_wei('20', 'gwei'),
-                'nonce': nonce
+                'nonce': nonce,
+                **self._fee_params()
             })
             
-            print(f"Signing transaction with private key: {self.private_key}")
-            signed_tx = self.web3.eth.account.sign_transaction(
-                transaction, 
-                private_key=self.private_key
-            )
+            signed_tx = self._acct.sign_transaction(transaction)
             
             # print(f"Signed transaction {signed_tx}")
             tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            _invalidate_read_cache()
             # Convert bytes to hex string if needed
             if isinstance(tx_hash, bytes):
                 return tx_hash.hex()
             return tx_hash
         except Exception as e:
-            print(f"Error in _build_and_send_transaction: {e}")
+            logger.error("Error in _build_and_send_transaction: %s", e)
+            # The reserved nonce may not have been used; resync from the chain on the next send
+            self.reset_nonce()
             raise
 
-    def store_did_document(self, did: str, document: str) -> bool:
+    def _next_nonce(self) -> int:
+        """Reserve the next nonce for this account, fetching the pending count only on first use."""
+        with _nonce_lock:
+            nonce = _nonces.get(self.account)
+            if nonce is None:
+                nonce = self.web3.eth.get_transaction_count(self.account, 'pending')
+            _nonces[self.account] = nonce + 1
+            return nonce
+
+    def reset_nonce(self):
+        """Forget the locally tracked nonce so the next send reads it from the chain again."""
+        with _nonce_lock:
+            _nonces.pop(self.account, None)
+
+    def _fee_params(self) -> Dict[str, int]:
+        """
+        Gas fee fields for a new transaction, cached for FEE_CACHE_TTL seconds
+        
+        Uses EIP-1559 fees from eth_feeHistory, falling back to a fixed legacy
+        gas price when the node does not report a base fee.
+        """
+        now = time.monotonic()
+        with _fee_lock:
+            if _fee_cache['fees'] is not None and _fee_cache['expires'] > now:
+                return _fee_cache['fees']
+        
+        try:
+            history = self.web3.eth.fee_history(4, 'latest', [50])
+            base_fee = history['baseFeePerGas'][-1]
+            rewards = sorted(reward[0] for reward in history.get('reward') or [[0]])
+            priority_fee = max(rewards[len(rewards) // 2], MIN_PRIORITY_FEE)
+            fees = {
+                'maxFeePerGas': 2 * base_fee + priority_fee,
+                'maxPriorityFeePerGas': priority_fee
+            }
+        except Exception as e:
+            logger.warning("Fee history unavailable, using legacy gas price: %s", e)
+            fees = {'gasPrice': LEGACY_GAS_PRICE}
+        
+        with _fee_lock:
+            _fee_cache['fees'] = fees
+            _fee_cache['expires'] = now + FEE_CACHE_TTL
+        return fees
+
+    def _cached_call(self, fn_name: str, *args):
+        """
+        Call a read-only contract function, reusing the result for READ_CACHE_TTL seconds
+        
+        Args:
+            fn_name: Contract function name
+            *args: Function arguments
+        """
+        key = (self.contract_address, fn_name, args)
+        now = time.monotonic()
+        with _read_cache_lock:
+            entry = _read_cache.get(key)
+            if entry is not None and entry[0] > now:
+                _read_cache.move_to_end(key)
+                return entry[1]
+        
+        if fn_name in _RAW_CALLS:
+            value = self._raw_call(*_RAW_CALLS[fn_name], args)
+        else:
+            value = getattr(self._functions, fn_name)(*args).call()
+        with _read_cache_lock:
+            _read_cache[key] = (now + READ_CACHE_TTL, value)
+            _read_cache.move_to_end(key)
+            while len(_read_cache) > READ_CACHE_MAX_ENTRIES:
+                _read_cache.popitem(last=False)
+        return value
+
+    def _raw_call(self, selector: bytes, arg_types: Tuple[str, ...], ret_types: Tuple[str, ...], args: tuple):
+        """
+        Call a read-only contract function with precomputed selector and ABI types
+        
+        Skips the per-call ABI lookup and validation of contract.functions.
+        Results are shaped like ContractFunction.call(): a single output is
+        returned bare, addresses are checksummed and arrays are lists.
+        """
+        data = selector + abi_encode(arg_types, args)
+        raw = self.web3.eth.call({'to': self.contract_address, 'data': data})
+        values = [
+            self._normalize_output(abi_type, value)
+            for abi_type, value in zip(ret_types, abi_decode(ret_types, raw))
+        ]
+        return values[0] if len(values) == 1 else values
+
+    def _normalize_output(self, abi_type: str, value):
+        """Checksum decoded addresses and turn decoded arrays into lists."""
+        if abi_type.endswith('[]'):
+            return [self._normalize_output(abi_type[:-2], item) for item in value]
+        if abi_type == 'address':
+            return Web3.to_checksum_address(value)
+        return value
+
+    def _wait_for_receipt(self, tx_hash):
+        """Wait for a transaction to be mined and drop cached reads it may have changed."""
+        tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+        _invalidate_read_cache()
+        return tx_receipt
+
+    def _send_transactions(self, function_calls: list, gas: int = 6000000) -> list:
+        """
+        Send several transactions back to back, then wait for their receipts concurrently
+        
+        Args:
+            function_calls: The contract function calls to send
+            gas: Gas limit for each transaction
+        
+        Returns:
+            The transaction receipts in the same order as function_calls
+        """
+        tx_hashes = [self._build_and_send_transaction(function_call, gas) for function_call in function_calls]
+        return list(_receipt_executor.map(self._wait_for_receipt, tx_hashes))
+
+    def store_did_documents(self, documents: List[Tuple[str, Union[str, Dict]]]) -> bool:
+        """
+        Store several DID documents, waiting for all transactions to be mined together
+        
+        Args:
+            documents: (did, document) pairs, each document a JSON string or a dict
+        
+        Returns:
+            bool: True if every transaction succeeded
+        """
+        try:
+            receipts = self._send_transactions([
+                self._functions.storeDIDDocument(did, _document_json(document))
+                for did, document in documents
+            ])
+            return all(receipt.status == 1 for receipt in receipts)
+        except Exception as e:
+            logger.error("Error storing DID documents on blockchain: %s", e)
+            return False
+
+    def store_did_document(self, did: str, document: Union[str, Dict]) -> bool:
         """
         Store a DID document on the blockchain
         
         Args:
             did: The DID to store the document for
-            document: The DID document as a JSON string
+            document: The DID document as a JSON string, or a dict to serialize
         
         Returns:
             bool: True if successful
         """
         try:
-            function_call = self.contract.functions.storeDIDDocument(did, document)
+            function_call = self._functions.storeDIDDocument(did, _document_json(document))
             tx_hash = self._build_and_send_transaction(function_call)
             
             # Wait for transaction to be mined
-            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_receipt = self._wait_for_receipt(tx_hash)
             return tx_receipt.status == 1
         except Exception as e:
-            print(f"Error storing DID document on blockchain: {e}")
+            logger.error("Error storing DID document on blockchain: %s", e)
             return False
 
     def get_did_document(self, did: str) -> Optional[Dict]:
@@ -99,82 +424,93 @@ class BlockchainService:
         """
         try:
             # Get the raw DID document from the contract
-            did_doc = self.contract.functions.didDocuments(did).call()
-            # print(f"Raw DID document from contract: {did_doc}")
-            # print(f"Type of did_doc: {type(did_doc)}")
+            did_doc = self._cached_call('didDocuments', did)
+            if not did_doc or not isinstance(did_doc, (list, tuple)) or len(did_doc) < 2:
+                return self._lookup_via_did_to_address(did)
             
-            if did_doc and isinstance(did_doc, (list, tuple)) and len(did_doc) > 1:
-                # The actual DID document is in the second element (index 1)
-                doc_str = did_doc[1]
-                # print(f"DID document string: {doc_str}")
-                # print(f"Type of document string: {type(doc_str)}")
-                
-                if doc_str:  # If document string is not empty
-                    try:
-                        # If it's already a dict, return it
-                        if isinstance(doc_str, dict):
-                            return doc_str
-                        
-                        # If it's bytes or bytearray, decode first
-                        if isinstance(doc_str, (bytes, bytearray)):
-                            json_str = doc_str.decode('utf-8')
-                        else:
-                            json_str = str(doc_str)
-                            
-                        # Try to parse JSON
-                        if json_str and json_str.strip():
-                            return json.loads(json_str)
-                    except json.JSONDecodeError as e:
-                        print(f"Error parsing DID document JSON: {e}")
-                        print(f"Failed JSON string: {json_str}")
-            
-            print("DID document not found in didDocuments, checking users and vehicles...")
+            # The actual DID document is in the second element (index 1)
+            doc_str = did_doc[1]
+            if isinstance(doc_str, dict):
+                return doc_str
             
-            # If not found in didDocuments, check users and vehicles
-            registered_addresses = self.contract.functions.getRegisteredAddresses().call()
-            print(f"Found {len(registered_addresses)} registered addresses")
+            # Only parse strings that can hold a JSON object; empty documents go straight to the fallback
+            if isinstance(doc_str, (bytes, bytearray)):
+                is_object = doc_str.lstrip()[:1] == b'{'
+            else:
+                doc_str = str(doc_str) if doc_str else ''
+                is_object = doc_str.lstrip()[:1] == '{'
             
-            # Check users
-            for address in registered_addresses:
-                user = self.contract.functions.users(address).call()
-                print(f"Checking user at address {address}: {user}")
-                
-                if user[3] == did:  # Match entity_did
-                    try:
-                        # Construct DID document from user data
-                        doc = {
-                            '@context': ['https://www.w3.org/ns/did/v1'],
-                            'id': did,
-                            'controller': address,
-                            'type': self._get_user_type_name(user[1]),
-                            'name': user[0],
-                            'entityDid': user[3],
-                            'walletDid': user[4],
-                            'service': []
-                        }
-                        if user[5]:  # Additional data/service endpoints
-                            try:
-                                if isinstance(user[5], (bytes, bytearray)):
-                                    service_str = user[5].decode('utf-8')
-                                else:
-                                    service_str = str(user[5])
-                                if service_str and service_str.strip():
-                                    doc['service'] = json.loads(service_str)
-                            except Exception as e:
-                                print(f"Error parsing service endpoints: {e}")
-                        return doc
-                    except Exception as e:
-                        print(f"Error constructing user DID document: {e}")
-                        continue
-                    
+            if is_object:
+                try:
+                    # Bytes are parsed directly, without decoding to str first
+                    return loads(doc_str)
+                except json.JSONDecodeError as e:
+                    logger.error("Error parsing DID document JSON: %s", e)
+                    logger.debug("Failed JSON string: %s", doc_str)
             
+            return self._lookup_via_did_to_address(did)
             
-            print(f"DID document not found for {did}")
+        except Exception as e:
+            logger.error("Error retrieving DID document: %s", e)
             return None
+
+    def _lookup_via_did_to_address(self, did: str) -> Optional[Dict]:
+        """Build a DID document from the registered user that owns the DID, if any."""
+        logger.debug("DID document not found in didDocuments, checking users...")
+        
+        # Check users through the contract's DID -> address index
+        found = self._find_user_by_did(did)
+        if found:
+            address, user = found
+            try:
+                # Construct DID document from user data
+                doc = {
+                    '@context': ['https://www.w3.org/ns/did/v1'],
+                    'id': did,
+                    'controller': address,
+                    'type': self._get_user_type_name(user[2]),
+                    'name': user[1],
+                    'entityDid': user[3],
+                    'walletDid': user[4],
+                    'service': []
+                }
+                if user[5]:  # Additional data/service endpoints
+                    try:
+                        if isinstance(user[5], (bytes, bytearray)):
+                            service_str = user[5]
+                        else:
+                            service_str = str(user[5])
+                        if service_str and service_str.strip():
+                            doc['service'] = loads(service_str)
+                    except Exception as e:
+                        logger.error("Error parsing service endpoints: %s", e)
+                return doc
+            except Exception as e:
+                logger.error("Error constructing user DID document: %s", e)
+
+        logger.debug("DID document not found for %s", did)
+        return None
+
+    def has_did_document(self, did: str) -> bool:
+        """
+        Check whether a DID resolves, without parsing its document
+        
+        Args:
+            did: The DID to check
             
+        Returns:
+            bool: True if a document is stored for the DID or it is a registered entity DID
+        """
+        try:
+            did_doc = self._cached_call('didDocuments', did)
+            if did_doc and isinstance(did_doc, (list, tuple)) and len(did_doc) > 1:
+                doc_str = did_doc[1]
+                if doc_str and (isinstance(doc_str, dict) or doc_str.strip()):
+                    return True
+            return self._find_user_by_did(did) is not None
         except Exception as e:
-            print(f"Error retrieving DID document: {e}")
-            return None
+            logger.error("Error checking DID document: %s", e)
+            return False
 
     def revoke_did_document(self, did: str) -> bool:
         """
@@ -187,14 +523,14 @@ class BlockchainService:
             bool: True if successful
         """
         try:
-            function_call = self.contract.functions.revokeDIDDocument(did)
+            function_call = self._functions.revokeDIDDocument(did)
             tx_hash = self._build_and_send_transaction(function_call)
             
             # Wait for transaction to be mined
-            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_receipt = self._wait_for_receipt(tx_hash)
             return tx_receipt.status == 1
         except Exception as e:
-            print(f"Error revoking DID document: {e}")
+            logger.error("Error revoking DID document: %s", e)
             return False
 
     def register_user(self, name: str, user_type: str, entity_did: str, wallet_did: str) -> Tuple[bool, str]:
@@ -212,21 +548,19 @@ class BlockchainService:
         """
         try:
             # Convert string user type to enum integer value
-            try:
-                user_type_enum = UserType[user_type.upper().replace(' ', '_')].value
-            except KeyError:
+            user_type_enum = _USER_TYPE_LOOKUP.get(user_type.upper())
+            if user_type_enum is None:
                 return False, f"Invalid user type: {user_type}. Must be one of {list(UserType.__members__.keys())}"
             
             # Check if user is already registered
-            user_info = self.contract.functions.users(self.account).call()
+            user_info = self._cached_call('users', self.account)
             if user_info[5]:  # isRegistered field
                 return False, "Address already registered"
             
-            print(f"Registering user with account: {self.account}")
-            print(f"Private key: {self.private_key}")
+            logger.debug("Registering user with account: %s", self.account)
             
             # Call the smart contract to register user
-            function_call = self.contract.functions.registerUser(
+            function_call = self._functions.registerUser(
                 name,
                 int(user_type_enum),
                 entity_did,
@@ -237,7 +571,7 @@ class BlockchainService:
             tx_hash = self._build_and_send_transaction(function_call)
             
             # Wait for transaction receipt
-            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_receipt = self._wait_for_receipt(tx_hash)
             if tx_receipt['status'] == 1:
                 return True, "User registered successfully!"
             else:
@@ -262,10 +596,10 @@ class BlockchainService:
             List[Dict]: List of vehicle information
         """
         try:
-            vehicles = self.contract.functions.getUserVehicles(owner_did).call()
+            vehicles = self._functions.getUserVehicles(owner_did).call()
             return vehicles
         except Exception as e:
-            print(f"Error getting user vehicles: {e}")
+            logger.error("Error getting user vehicles: %s", e)
             return []
 
     def update_vehicle_config(self, vehicle_wallet_did: str, config: str) -> Tuple[bool, str]:
@@ -281,7 +615,7 @@ class BlockchainService:
         """
         try:
             # Build transaction
-            update_config = self.contract.functions.updateVehicleConfig(
+            update_config = self._functions.updateVehicleConfig(
                 vehicle_wallet_did,
                 config
             )
@@ -295,7 +629,7 @@ class BlockchainService:
                 return False, "Failed to update vehicle configuration"
                 
         except Exception as e:
-            print(f"Error updating vehicle configuration: {e}")
+            logger.error("Error updating vehicle configuration: %s", e)
             return False, str(e)
 
     def authorize_mechanic(self, vin: str, mechanic_address: str) -> str:
@@ -309,7 +643,7 @@ class BlockchainService:
         Returns:
             Transaction hash
         """
-        function_call = self.contract.functions.authorizeMechanic(
+        function_call = self._functions.authorizeMechanic(
             vin,
             mechanic_address
         )
@@ -327,7 +661,7 @@ class BlockchainService:
         Returns:
             Transaction hash
         """
-        function_call = self.contract.functions.addMaintenanceRecord(
+        function_call = self._functions.addMaintenanceRecord(
             vin,
             service_description,
             is_critical
@@ -346,7 +680,7 @@ class BlockchainService:
         Returns:
             Transaction hash
         """
-        function_call = self.contract.functions.createInsurancePolicy(
+        function_call = self._functions.createInsurancePolicy(
             vin,
             start_date,
             end_date
@@ -370,7 +704,7 @@ class BlockchainService:
         Returns:
             Transaction hash
         """
-        function_call = self.contract.functions.recordInteraction(
+        function_call = self._functions.recordInteraction(
             source_address,
             destination_address,
             source_identifier,
@@ -381,6 +715,52 @@ class BlockchainService:
         return self._build_and_send_transaction(function_call)
 
 
+    def iter_entity_interactions(self, identifier: str,
+                                 predicate: Optional[Callable[[tuple], bool]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the interactions for a specific entity one at a time
+        
+        Args:
+            identifier: Entity identifier (VIN, DID, etc.)
+            predicate: Optional filter applied to each raw interaction tuple,
+                so rejected rows are never converted or decoded
+        
+        Yields:
+            Interaction dictionaries
+        """
+        try:
+            # Get raw interactions from contract
+            raw_interactions = self._functions.getEntityInteractions(identifier).call()
+        except Exception as e:
+            logger.error("Error getting entity interactions: %s", e)
+            return
+        
+        if predicate is not None:
+            raw_interactions = [interaction for interaction in raw_interactions if predicate(interaction)]
+        # Content store references are swapped for the payload they point to, so every reader
+        # sees the original bytes; references that cannot be resolved are passed through
+        payloads = [
+            (load_payload(interaction[5]) or interaction[5]) if is_payload_ref(interaction[5]) else interaction[5]
+            for interaction in raw_interactions
+        ]
+        payloads_data = _decode_payloads_bulk(payloads)
+        
+        for interaction, payload, payload_data in zip(raw_interactions, payloads, payloads_data):
+            # Expected tuple structure:
+            # (source_address, destination_address, source_identifier, destination_identifier, 
+            #  interaction_type, payload, timestamp, transaction_hash)
+            yield {
+                'source_address': interaction[0],
+                'destination_address': interaction[1],
+                'source_identifier': interaction[2],
+                'destination_identifier': interaction[3],
+                'interaction_type': interaction[4],
+                'payload': payload,
+                'payload_data': payload_data,
+                'timestamp': interaction[6],
+                'transaction_hash': interaction[7] if len(interaction) > 7 else None
+            }
+
     def get_entity_interactions(self, identifier: str) -> List[Dict[str, Any]]:
         """
         Retrieve all interactions for a specific entity
@@ -392,30 +772,9 @@ class BlockchainService:
             List of interactions
         """
         try:
-            # Get raw interactions from contract
-            raw_interactions = self.contract.functions.getEntityInteractions(identifier).call()
-            
-            # Convert tuples to dictionaries
-            interactions = []
-            for interaction in raw_interactions:
-                # Expected tuple structure:
-                # (source_address, destination_address, source_identifier, destination_identifier, 
-                #  interaction_type, payload, timestamp, transaction_hash)
-                interaction_dict = {
-                    'source_address': interaction[0],
-                    'destination_address': interaction[1],
-                    'source_identifier': interaction[2],
-                    'destination_identifier': interaction[3],
-                    'interaction_type': interaction[4],
-                    'payload': interaction[5],
-                    'timestamp': interaction[6],
-                    'transaction_hash': interaction[7] if len(interaction) > 7 else None
-                }
-                interactions.append(interaction_dict)
-            
-            return interactions
+            return list(self.iter_entity_interactions(identifier))
         except Exception as e:
-            print(f"Error getting entity interactions: {e}")
+            logger.error("Error getting entity interactions: %s", e)
             return []
 
     def get_vehicle_interactions(self, vin: str) -> List[Dict[str, Any]]:
@@ -441,7 +800,7 @@ class BlockchainService:
         Returns:
             List of interactions between the two entities
         """
-        return self.contract.functions.getInteractionsBetweenEntities(identifier1, identifier2).call()
+        return self._functions.getInteractionsBetweenEntities(identifier1, identifier2).call()
 
 
     def is_valid_did(self, did: str) -> bool:
@@ -454,7 +813,7 @@ class BlockchainService:
         Returns:
             Boolean indicating DID validity
         """
-        return self.contract.functions.isValidDID(did).call()
+        return self._cached_call('isValidDID', did)
 
     def get_address_by_did(self, did: str) -> Optional[str]:
         """
@@ -463,7 +822,7 @@ class BlockchainService:
         Args:
             did: User's Decentralized Identifier
         """
-        user_address = self.contract.functions.didToAddress(did).call()
+        user_address = self._cached_call('didToAddress', did)
         return user_address
 
     def get_vehicle_by_did(self, did: str) -> Optional[Dict[str, Any]]:
@@ -477,25 +836,30 @@ class BlockchainService:
             Vehicle information if found, None otherwise
         """
         # Check if DID is valid and not revoked
-        is_valid = self.contract.functions.isValidDID(did).call()
+        is_valid = self._cached_call('isValidDID', did)
         if not is_valid:
             return None
 
-        # Since vehicles are stored by VIN, we need to search through the events
-        # to find the vehicle registration event with this DID
-        register_filter = self.contract.events.VehicleRegistered.create_filter(
-            fromBlock=0,
-            argument_filters={'entityDID': did}
-        )
-        events = register_filter.get_all_entries()
-        
-        if not events:
+        vin = _vin_by_did.get(did)
+        if vin is None:
+            # Vehicles are stored by VIN. VehicleRegistered only indexes the VIN (as a topic
+            # hash) and the owner, so the DID cannot be matched from events; the VIN is read
+            # from the vehicle's DID document, where register_vehicle records it in info[]
+            did_doc = self.get_did_document(did) or {}
+            vin = next(
+                (entry['vin'] for entry in did_doc.get('info', [])
+                 if isinstance(entry, dict) and entry.get('vin')),
+                None
+            )
+            if vin is None:
+                return None
+        # The public getter leaves out the struct's arrays: (vin, make, model, year, currentOwner,
+        # entityDID, walletDID, credentialDID, isRegistered, currentInsurer)
+        vehicle = self._functions.vehicles(vin).call()
+        if vehicle[5] != did:
+            # No on-chain vehicle record for this DID under that VIN
             return None
-            
-        # Get the most recent registration event
-        event = events[-1]
-        vin = event.args.vin
-        vehicle = self.contract.functions.vehicles(vin).call()
+        _vin_by_did[did] = vin
         
         return {
             'vin': vin,
@@ -503,10 +867,10 @@ class BlockchainService:
             'model': vehicle[2],
             'year': vehicle[3],
             'current_owner': vehicle[4],
-            'entity_did': vehicle[6],
-            'wallet_did': vehicle[7],
-            'credential_did': vehicle[8],
-            'is_registered': vehicle[9]
+            'entity_did': vehicle[5],
+            'wallet_did': vehicle[6],
+            'credential_did': vehicle[7],
+            'is_registered': vehicle[8]
         }
 
     def store_credential(self, credential_id: str, issuer_did: str, subject_did: str, credential_data: str) -> str:
@@ -522,7 +886,7 @@ class BlockchainService:
         Returns:
             Transaction hash
         """
-        function_call = self.contract.functions.storeCredential(
+        function_call = self._functions.storeCredential(
             credential_id,
             issuer_did,
             subject_did,
@@ -541,7 +905,7 @@ class BlockchainService:
             Credential data as JSON string if found, None otherwise
         """
         try:
-            return self.contract.functions.getCredential(credential_id).call()
+            return self._cached_call('getCredential', credential_id)
         except Exception:
             return None
 
@@ -556,14 +920,7 @@ class BlockchainService:
         Returns:
             str: Name of the user type
         """
-        user_types = {
-            0: "Individual",
-            1: "Mechanic",
-            2: "Insurance Provider",
-            3: "Roadside Unit",
-            4: "Vehicle Manufacturer"
-        }
-        return user_types.get(type_id, "Unknown")
+        return _USER_TYPE_NAMES[type_id] if 0 <= type_id < len(_USER_TYPE_NAMES) else "Unknown"
 
     def get_registered_addresses(self) -> list:
         """
@@ -573,23 +930,203 @@ class BlockchainService:
             list: List of registered addresses
         """
         try:
-            return self.contract.functions.getRegisteredAddresses().call()
+            return self._cached_call('getRegisteredAddresses')
         except Exception as e:
-            print(f"Error getting registered addresses: {e}")
+            logger.error("Error getting registered addresses: %s", e)
             return []
         
     def get_account(self) -> str:
         """Get the current account address being used"""
         return self.account
 
+    def _get_multicall(self):
+        """
+        Get the Multicall3 contract, or None if it is not deployed on this chain.
+        The deployment check runs once per service instance.
+        """
+        if not self._multicall_checked:
+            self._multicall_checked = True
+            try:
+                address = self.web3.to_checksum_address(Settings.MULTICALL3_ADDRESS)
+                if self.web3.eth.get_code(address):
+                    self._multicall = self.web3.eth.contract(address=address, abi=MULTICALL3_ABI)
+            except Exception as e:
+                logger.warning("Multicall3 unavailable, using JSON-RPC batches: %s", e)
+        return self._multicall
+
+    def _batch_rpc(self, calls: List[Tuple[str, list]]) -> List[Any]:
+        """
+        Send several JSON-RPC requests as one batch POST
+        
+        Args:
+            calls: (method, params) pairs
+        
+        Returns:
+            The raw results in the same order as calls
+        """
+        payload = [
+            {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}
+            for request_id, (method, params) in enumerate(calls)
+        ]
+        response = _http_session().post(
+            self.web3.provider.endpoint_uri,
+            data=dumps(payload),
+            headers={'Content-Type': 'application/json'},
+            timeout=RPC_TIMEOUT
+        )
+        response.raise_for_status()
+        results = [None] * len(calls)
+        for reply in loads(response.content):
+            if 'error' in reply:
+                raise ValueError(f"JSON-RPC error: {reply['error']}")
+            results[reply['id']] = reply['result']
+        return results
+
+    def _batch_eth_call(self, calls: List[Tuple[str, str]]) -> List[bytes]:
+        """Run (target, calldata) eth_calls in one JSON-RPC batch; used when Multicall3 is not deployed."""
+        results = self._batch_rpc([
+            ('eth_call', [{'to': target, 'data': data}, 'latest'])
+            for target, data in calls
+        ])
+        return [bytes.fromhex(result[2:]) for result in results]
+
+    def get_users_batch(self, addresses: List[str]) -> List[List[Any]]:
+        """
+        Read the users(address) tuples for many addresses in one round-trip
+        
+        Args:
+            addresses: Registered user addresses
+        
+        Returns:
+            List of user tuples in the same order as addresses
+        """
+        if not addresses:
+            return []
+        
+        calls = [
+            (self.contract_address, self.contract.encodeABI(fn_name="users", args=[address]))
+            for address in addresses
+        ]
+        multicall = self._get_multicall()
+        if multicall is not None:
+            _, return_data = multicall.functions.aggregate(calls).call()
+        else:
+            return_data = self._batch_eth_call(calls)
+        output_types = [output['type'] for output in self.contract.get_function_by_name("users").abi['outputs']]
+        return [list(self.web3.codec.decode(output_types, data)) for data in return_data]
+
+    def get_account_states(self, addresses: List[str]) -> List[Tuple[int, bool]]:
+        """
+        Read the balance and registration flag of many addresses in one round-trip
+        
+        Args:
+            addresses: Blockchain addresses to check
+        
+        Returns:
+            List of (balance, is_registered) tuples in the same order as addresses
+        """
+        if not addresses:
+            return []
+        
+        addresses = [self.web3.to_checksum_address(address) for address in addresses]
+        multicall = self._get_multicall()
+        if multicall is None:
+            count = len(addresses)
+            results = self._batch_rpc(
+                [('eth_getBalance', [address, 'latest']) for address in addresses] +
+                [
+                    ('eth_call', [{'to': self.contract_address, 'data': self.contract.encodeABI(fn_name="users", args=[address])}, 'latest'])
+                    for address in addresses
+                ]
+            )
+            output_types = [output['type'] for output in self.contract.get_function_by_name("users").abi['outputs']]
+            return [
+                (int(balance, 16), self.web3.codec.decode(output_types, bytes.fromhex(user[2:]))[5])
+                for balance, user in zip(results[:count], results[count:])
+            ]
+        
+        calls = [
+            (multicall.address, multicall.encodeABI(fn_name="getEthBalance", args=[address]))
+            for address in addresses
+        ]
+        calls += [
+            (self.contract_address, self.contract.encodeABI(fn_name="users", args=[address]))
+            for address in addresses
+        ]
+        _, return_data = multicall.functions.aggregate(calls).call()
+        output_types = [output['type'] for output in self.contract.get_function_by_name("users").abi['outputs']]
+        count = len(addresses)
+        return [
+            (self.web3.codec.decode(['uint256'], balance)[0], self.web3.codec.decode(output_types, user)[5])
+            for balance, user in zip(return_data[:count], return_data[count:])
+        ]
+
+    def _find_user_by_did(self, did: str) -> Optional[Tuple[str, Any]]:
+        """
+        Look up a user by entity DID with the contract's didToAddress index
+        
+        Returns:
+            (address, users tuple) if the DID is a registered entity DID, None otherwise
+        """
+        address = self._cached_call('didToAddress', did)
+        if int(address, 16) == 0:
+            return None
+        user = self._cached_call('users', address)
+        # didToAddress also maps wallet DIDs; only entity DIDs match here
+        if user[3] != did:
+            return None
+        return address, user
+
+    def _get_registered_user_tuples(self):
+        """Get (address, users tuple) pairs for every registered address, read in one batch."""
+        registered_addresses = self._cached_call('getRegisteredAddresses')
+        return zip(registered_addresses, self.get_users_batch(registered_addresses))
+
+    def _get_addresses_of_type(self, type_id: int) -> List[str]:
+        """
+        Get the addresses registered with the given type ID
+        
+        The index only scans blocks it has not seen yet, and at most once per
+        READ_CACHE_TTL seconds unless a transaction has been sent since.
+        """
+        with _type_index_lock:
+            if _type_index['expires'] <= time.monotonic():
+                with _read_cache_lock:
+                    generation = _type_index['generation']
+                latest = self.web3.eth.block_number
+                from_block = _type_index['next_block']
+                if from_block is None:
+                    from_block = Settings.DEPLOY_BLOCK
+                if from_block <= latest:
+                    events = self.contract.events.UserRegistered.get_logs(fromBlock=from_block, toBlock=latest)
+                    for event in events:
+                        _type_index['by_type'].setdefault(event.args.userType, []).append(event.args.userAddress)
+                    _type_index['next_block'] = latest + 1
+                with _read_cache_lock:
+                    if _type_index['generation'] == generation:
+                        _type_index['expires'] = time.monotonic() + READ_CACHE_TTL
+            return list(_type_index['by_type'].get(type_id, ()))
+
+    def _get_registered_users_of_type(self, type_id: int) -> List[Dict[str, Any]]:
+        """Get registered users with the given type ID, reading only addresses of that type."""
+        addresses = self._get_addresses_of_type(type_id)
+        return [
+            {
+                'name': user[1],
+                'did': user[3],
+                'address': address,
+                'type': user[2]  # This is the type ID
+            }
+            for address, user in zip(addresses, self.get_users_batch(addresses))
+            if user[2] == type_id
+        ]
+
     def get_registered_users(self) -> List[Dict[str, Any]]:
         """Get all registered users with their DIDs and types."""
         # try:
-        registered_addresses = self.contract.functions.getRegisteredAddresses().call()
         users = []
         
-        for address in registered_addresses:
-            user = self.contract.functions.users(address).call()
+        for address, user in self._get_registered_user_tuples():
             if user[3]:  # If user has a DID
                 user_info = {
                     'name': user[1],
@@ -607,104 +1144,71 @@ class BlockchainService:
     def get_user_info(self,did) -> List[Dict[str, Any]]:
         """Get all registered users with their DIDs and types."""
         try:
-            registered_addresses = self.contract.functions.getRegisteredAddresses().call()
-            users = []
-            
-            for address in registered_addresses:
-                user = self.contract.functions.users(address).call()
-                if user[3] == did:  # If user has a DID
-                    return {
-                        'name': user[1],
-                        'did': user[3],
-                        'address': address,
-                        'type': user[2]  # This is the type ID
-                    }
+            found = self._find_user_by_did(did)
+            if found:
+                address, user = found
+                return {
+                    'name': user[1],
+                    'did': user[3],
+                    'address': address,
+                    'type': user[2]  # This is the type ID
+                }
             return None
         except Exception as e:
-            print(f"Error getting registered users: {str(e)}")
+            logger.error("Error getting registered users: %s", e)
             return []
 
     def get_registered_vehicles(self) -> List[Dict[str, Any]]:
         """Get all registered users with their DIDs and types."""
         try:
-            registered_addresses = self.contract.functions.getRegisteredAddresses().call()
-            vehicles = []
-            
-            for address in registered_addresses:
-                user = self.contract.functions.users(address).call()
-                if user[2]== 5: 
-                    user_info = {
-                        'name': user[1],
-                        'did': user[3],
-                        'address': address,
-                        'type': user[2]  # This is the type ID
-                    }
-                    vehicles.append(user_info)
-            
-            return vehicles
+            return self._get_registered_users_of_type(UserType.CAR.value)
 
         except Exception as e:
-            print(f"Error getting registered users: {str(e)}")
+            logger.error("Error getting registered users: %s", e)
             return []
 
     def get_registered_rsus(self) -> List[Dict[str, Any]]:
         """Get all registered users with their DIDs and types."""
         try:
-            registered_addresses = self.contract.functions.getRegisteredAddresses().call()
-            rsus = []
-            
-            for address in registered_addresses:
-                user = self.contract.functions.users(address).call()
-                if user[2]== 3:  # If user has a DID
-                    user_info = {
-                        'name': user[1],
-                        'did': user[3],
-                        'address': address,
-                        'type': user[2]  # This is the type ID
-                    }
-                    rsus.append(user_info)
-            
-            return rsus
+            return self._get_registered_users_of_type(UserType.ROADSIDE_UNIT.value)
 
         except Exception as e:
-            print(f"Error getting registered users: {str(e)}")
+            logger.error("Error getting registered users: %s", e)
             return []
         
-    def register_vehicle(self, did: str, vin: str, make: str, model: str, year: int,
-                        entity_did: str, wallet_did: str, credential_did: str) -> Tuple[bool, str]:
+    def register_vehicle(self, vin: str, owner_did: str, entity_did: str, year: int,
+                        make: str, model: str, wallet_did: str) -> Tuple[bool, str]:
         """
-        Register a vehicle using DID as primary identifier
+        Write the on-chain vehicle record, keyed by VIN
         
         Args:
-            did: Primary DID identifier for the vehicle
             vin: Vehicle Identification Number
+            owner_did: Entity DID of the registered owner
+            entity_did: Vehicle's entity DID
+            year: Vehicle year
             make: Vehicle make
             model: Vehicle model
-            year: Vehicle year
-            entity_did: Entity DID
-            wallet_did: Wallet DID
-            credential_did: Credential DID
+            wallet_did: Vehicle's wallet DID
         
         Returns:
             Tuple[bool, str]: Success status and message
         """
         try:
-            function_call = self.contract.functions.registerVehicle(
-                did,
+            function_call = self._functions.registerVehicle(
                 vin,
+                owner_did,
+                entity_did,
+                year,
                 make,
                 model,
-                year,
-                entity_did,
-                wallet_did,
-                credential_did
+                wallet_did
             )
             
             tx_hash = self._build_and_send_transaction(function_call)
-            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_receipt = self._wait_for_receipt(tx_hash)
             
             if tx_receipt.status == 1:
-                return True, f"Vehicle registered successfully. Transaction: {tx_hash.hex()}"
+                return True, f"Vehicle registered successfully. Transaction: {tx_hash}"
             else:
                 return False, "Transaction failed"
                 
@@ -714,24 +1218,10 @@ class BlockchainService:
     def get_registered_mechanic(self) -> List[Dict[str, Any]]:
         """Get all registered users with their DIDs and types."""
         try:
-            registered_addresses = self.contract.functions.getRegisteredAddresses().call()
-            vehicles = []
-            
-            for address in registered_addresses:
-                user = self.contract.functions.users(address).call()
-                if user[2]== 1:  # If user has a DID
-                    user_info = {
-                        'name': user[1],
-                        'did': user[3],
-                        'address': address,
-                        'type': user[2]  # This is the type ID
-                    }
-                    vehicles.append(user_info)
-            
-            return vehicles
+            return self._get_registered_users_of_type(UserType.MECHANIC.value)
 
         except Exception as e:
-            print(f"Error getting registered users: {str(e)}")
+            logger.error("Error getting registered users: %s", e)
             return []
 
     def is_address_registered(self, address: str) -> bool:
@@ -748,9 +1238,9 @@ class BlockchainService:
             # Convert address to checksum format
             checksum_address = self.web3.to_checksum_address(address)
             # Call the smart contract to check if user exists
-            user_info = self.contract.functions.users(checksum_address).call()
+            user_info = self._cached_call('users', checksum_address)
             # Check isRegistered field directly
             return user_info[5]  # isRegistered is at index 5 in the User struct
         except Exception as e:
-            print(f"Error checking address registration: {e}")
+            logger.error("Error checking address registration: %s", e)
             return False        
\ No newline at end of file
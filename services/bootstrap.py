@@ -0,0 +1,22 @@
+"""
+Process-wide service instances.
+
+The Streamlit app, the API server and the services themselves share one
+BlockchainService so the process keeps a single Web3 client and contract.
+"""
+import threading
+from typing import Optional
+from services.blockchain_service import BlockchainService
+
+_blockchain_service: Optional[BlockchainService] = None
+_blockchain_service_lock = threading.Lock()
+
+
+def get_blockchain_service() -> BlockchainService:
+    """Get the shared BlockchainService for the default account, creating it on first use."""
+    global _blockchain_service
+    if _blockchain_service is None:
+        with _blockchain_service_lock:
+            if _blockchain_service is None:
+                _blockchain_service = BlockchainService()
+    return _blockchain_service
@@ -1,48 +1,197 @@
 import hashlib
 import base64
-import json
+import copy
+import logging
+import threading
+import time
 import uuid
 import os
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Optional, Tuple, List
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple, List, Union
 from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from cryptography.hazmat.primitives.asymmetric import padding, utils
 from cryptography.hazmat.primitives import hashes
 from services.blockchain_service import BlockchainService, UserType
-from services.address_manager import AddressManager
+from services.address_manager import get_address_manager
+from services.bootstrap import get_blockchain_service
+from services.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# New DIDs use Ed25519 keys; RSA keys created before the switch are still supported
+PrivateKey = Union[ed25519.Ed25519PrivateKey, rsa.RSAPrivateKey]
+PublicKey = Union[ed25519.Ed25519PublicKey, rsa.RSAPublicKey]
+
+# Shared worker pool for DIDComm envelope work kept off the request-handling path
+_didcomm_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="didcomm")
+
+# Worker pool that overlaps independent blockchain reads
+_read_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="did-read")
+
+# Parsed DID documents shared by every DIDService; entries are dropped whenever this module
+# writes the DID or records an interaction for it
+DID_DOC_CACHE_TTL = 15
+DID_DOC_CACHE_MAX_ENTRIES = 1024
+_did_doc_cache: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+_did_doc_cache_lock = threading.Lock()
+
+# Read-only documents for evaluate_data_request, which only reads type and name; these are
+# kept longer than the shared cache above and dropped along with it
+EVALUATION_DOC_TTL = 300
+EVALUATION_DOC_MAX_ENTRIES = 10000
+_evaluation_docs: "OrderedDict[str, Tuple[float, Mapping]]" = OrderedDict()
+_evaluation_docs_lock = threading.RLock()
+
+# Responses for RSU requests in evaluate_data_request, keyed by casefolded message type
+_RSU_RESPONSES: Dict[str, str] = {
+    "road condition": "Road condition data access granted for safety monitoring",
+    "weather alert": "Weather-related data access granted for safety alerts",
+}
+_RSU_TRAFFIC_RESPONSE = "Traffic data access granted for traffic management"
+_RSU_DEFAULT_RESPONSE = "Data access granted for RSU monitoring"
+_TRAFFIC_TOKENS = frozenset({"traffic", "congestion", "incident"})
+
+# Issued credentials never change, so they are kept without a TTL
+CREDENTIAL_CACHE_MAX_ENTRIES = 4096
+_credential_cache: "OrderedDict[str, Dict]" = OrderedDict()
+_credential_cache_lock = threading.Lock()
+
+def canonicalize(doc: Dict) -> bytes:
+    """
+    Canonical byte form of a document for hashing and signing
+    
+    Compact, key-sorted JSON, so semantically equal documents give identical bytes.
+    This is the single place to swap in JSON-LD normalization if strict verifiers need it.
+    """
+    return dumps(doc, sort_keys=True)
+
+def _credential_digest(credential: Dict) -> bytes:
+    """SHA-256 of the credential's canonical form"""
+    return hashlib.sha256(canonicalize(credential)).digest()
+
+def _forget_did_docs(*dids: str):
+    """Drop cached documents for DIDs that were just written."""
+    with _did_doc_cache_lock:
+        for did in dids:
+            _did_doc_cache.pop(did, None)
+    with _evaluation_docs_lock:
+        for did in dids:
+            _evaluation_docs.pop(did, None)
+
+def _with_crt_params(private_key: rsa.RSAPrivateKey) -> rsa.RSAPrivateKey:
+    """Make sure an RSA key carries its CRT parameters, so OpenSSL signs on the CRT path"""
+    numbers = private_key.private_numbers()
+    if numbers.dmp1 and numbers.dmq1 and numbers.iqmp:
+        return private_key
+    return rsa.RSAPrivateNumbers(
+        p=numbers.p,
+        q=numbers.q,
+        d=numbers.d,
+        dmp1=rsa.rsa_crt_dmp1(numbers.d, numbers.p),
+        dmq1=rsa.rsa_crt_dmq1(numbers.d, numbers.q),
+        iqmp=rsa.rsa_crt_iqmp(numbers.p, numbers.q),
+        public_numbers=numbers.public_numbers
+    ).private_key()
+
+class _TrackedList(list):
+    """List that bumps its owning DIDDocument's revision whenever it is modified"""
+    def __init__(self, document: "DIDDocument"):
+        super().__init__()
+        self._document = document
+
+    def _modified(self):
+        self._document._revision += 1
+
+    def append(self, item):
+        super().append(item)
+        self._modified()
+
+    def extend(self, items):
+        super().extend(items)
+        self._modified()
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self._modified()
+
+    def remove(self, item):
+        super().remove(item)
+        self._modified()
+
+    def pop(self, index=-1):
+        item = super().pop(index)
+        self._modified()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._modified()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._modified()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._modified()
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
 
 class DIDDocument:
+    _CONTEXT = (
+        "https://www.w3.org/2018/credentials/v1",
+        "https://www.w3.org/ns/did/v1",
+        "https://w3id.org/security/v1"
+    )
+
     def __init__(self, did: str, public_key: bytes, created: datetime = None):
+        self._revision = 0
+        self._dict_cache = None
         self.did = did
-        self.info = []
+        self.info = _TrackedList(self)
         self.public_key = public_key
         self.created = created or datetime.utcnow()
-        self.authentication = []
-        self.service_endpoints = []
-        self.type = []
+        self.authentication = _TrackedList(self)
+        self.service_endpoints = _TrackedList(self)
+        self.type = _TrackedList(self)
         self.controller = None
-        self.verificationMethod = []
-        self.credentials = []
+        self.verificationMethod = _TrackedList(self)
+        self.credentials = _TrackedList(self)
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name not in ('_revision', '_dict_cache'):
+            self._revision += 1
 
     def to_dict(self) -> Dict:
-        """Convert DID Document to dictionary format following W3C spec"""
+        """
+        Convert DID Document to dictionary format following W3C spec
+        
+        The result is reused until an attribute or one of the document's lists
+        changes; changes made inside list items are not detected.
+        """
+        if self._dict_cache is not None and self._dict_cache[0] == self._revision:
+            return self._dict_cache[1]
+        
         # Create the verification method for the public key
         key_id = f"{self.did}#keys-1"
         verification_method = {
             "id": key_id,
-            "type": "RsaVerificationKey2018",
+            "type": "Ed25519VerificationKey2020",
             "controller": self.did,
             "publicKeyPem": self.public_key.decode('utf-8')
         }
         
         # Base DID Document structure
         doc = {
-            "@context": [
-                "https://www.w3.org/2018/credentials/v1",
-                "https://www.w3.org/ns/did/v1",
-                "https://w3id.org/security/v1"
-            ],
+            "@context": self._CONTEXT,
             "id": self.did,
             "type":self.type,
             "info": self.info,
@@ -57,67 +206,117 @@ class DIDDocument:
         # Add controller if present
         if self.controller:
             doc["controller"] = self.controller
-            
+        
+        self._dict_cache = (self._revision, doc)
         return doc
 
 class DIDWallet:
     def __init__(self, storage_path: str = None):
         self.storage_path = storage_path or "did_wallet"
         os.makedirs(self.storage_path, exist_ok=True)
-
-    def store_keys(self, did: str, private_key: bytes, public_key: bytes):
-        """Store keys securely"""
-        did_folder = os.path.join(self.storage_path, did.replace(":", "_"))
-        os.makedirs(did_folder, exist_ok=True)
+        # Parsed key objects per DID, so signing and verifying skip the disk read and PEM decode
+        self._priv_cache: Dict[str, PrivateKey] = {}
+        self._pub_cache: Dict[str, PublicKey] = {}
+        self._pub_pem_cache: Dict[str, bytes] = {}
+
+    def store_keys(self, did: str, private_key: bytes, public_key: bytes, public_pem: bytes):
+        """Store keys securely, as DER plus the public PEM used in DID documents"""
+        self._priv_cache.pop(did, None)
+        self._pub_cache.pop(did, None)
+        did_folder = self._did_folder(did)
+        did_folder.mkdir(parents=True, exist_ok=True)
 
         # Store private key (in practice, this should be encrypted)
-        with open(os.path.join(did_folder, "private.pem"), "wb") as f:
-            f.write(private_key)
+        (did_folder / "private.der").write_bytes(private_key)
 
         # Store public key
-        with open(os.path.join(did_folder, "public.pem"), "wb") as f:
-            f.write(public_key)
+        (did_folder / "public.der").write_bytes(public_key)
+        (did_folder / "public.pem").write_bytes(public_pem)
+        self._pub_pem_cache[did] = public_pem
+
+    def _did_folder(self, did: str) -> Path:
+        """Folder holding the key files for a DID"""
+        return Path(self.storage_path) / did.replace(":", "_")
 
     def get_keys(self, did: str) -> Tuple[bytes, bytes]:
-        """Retrieve keys for a DID"""
-        did_folder = os.path.join(self.storage_path, did.replace(":", "_"))
-        
-        with open(os.path.join(did_folder, "private.pem"), "rb") as f:
-            private_key = f.read()
+        """Retrieve keys for a DID, as DER or, for wallets created before DER storage, PEM"""
+        did_folder = self._did_folder(did)
+        extension = "der" if (did_folder / "private.der").exists() else "pem"
         
-        with open(os.path.join(did_folder, "public.pem"), "rb") as f:
-            public_key = f.read()
+        private_key = (did_folder / f"private.{extension}").read_bytes()
+        public_key = (did_folder / f"public.{extension}").read_bytes()
         
         return private_key, public_key
 
+    def get_public_pem(self, did: str) -> bytes:
+        """Retrieve the PEM-encoded public key for a DID, reading it from disk on first use"""
+        public_pem = self._pub_pem_cache.get(did)
+        if public_pem is None:
+            public_pem = (self._did_folder(did) / "public.pem").read_bytes()
+            self._pub_pem_cache[did] = public_pem
+        return public_pem
+
+    def get_private_key_obj(self, did: str) -> PrivateKey:
+        """Get the parsed private key for a DID, loading it from disk on first use"""
+        private_key = self._priv_cache.get(did)
+        if private_key is None:
+            private_key_data, _ = self.get_keys(did)
+            if private_key_data.startswith(b"-----"):
+                private_key = serialization.load_pem_private_key(private_key_data, password=None)
+            else:
+                private_key = serialization.load_der_private_key(private_key_data, password=None)
+            if isinstance(private_key, rsa.RSAPrivateKey):
+                private_key = _with_crt_params(private_key)
+            self._priv_cache[did] = private_key
+        return private_key
+
+    def get_public_key_obj(self, did: str) -> PublicKey:
+        """Get the parsed public key for a DID, loading it from disk on first use"""
+        public_key = self._pub_cache.get(did)
+        if public_key is None:
+            _, public_key_data = self.get_keys(did)
+            if public_key_data.startswith(b"-----"):
+                public_key = serialization.load_pem_public_key(public_key_data)
+            else:
+                public_key = serialization.load_der_public_key(public_key_data)
+            self._pub_cache[did] = public_key
+        return public_key
+
 class DIDService:
     DID_METHOD = "ssi"
     
     def __init__(self, blockchain_service: BlockchainService = None):
-        self.blockchain_service = blockchain_service or BlockchainService()
-        self.address_manager = AddressManager(blockchain_service=self.blockchain_service)
+        self.blockchain_service = blockchain_service or get_blockchain_service()
+        self.address_manager = get_address_manager(blockchain_service=self.blockchain_service)
         self.wallet = DIDWallet()
 
-    def _generate_key_pair(self) -> Tuple[bytes, bytes]:
-        """Generate RSA key pair"""
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048
-        )
+    def _generate_key_pair(self) -> Tuple[bytes, bytes, bytes]:
+        """Generate Ed25519 key pair as (private DER, public DER, public PEM)"""
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        public_key = private_key.public_key()
         
-        private_pem = private_key.private_bytes(
-            encoding=serialization.Encoding.PEM,
+        private_der = private_key.private_bytes(
+            encoding=serialization.Encoding.DER,
             format=serialization.PrivateFormat.PKCS8,
             encryption_algorithm=serialization.NoEncryption()
         )
         
-        public_pem = private_key.public_key().public_bytes(
+        public_der = public_key.public_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        
+        public_pem = public_key.public_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PublicFormat.SubjectPublicKeyInfo
         )
         
-        return private_pem, public_pem
+        return private_der, public_der, public_pem
+
 
+    def _generate_key_pairs(self, count: int) -> List[Tuple[bytes, bytes, bytes]]:
+        """Generate several independent key pairs"""
+        return [self._generate_key_pair() for _ in range(count)]
 
     def create_user_dids(self):
         """
@@ -138,31 +337,83 @@ class DIDService:
             entity_did = f"did:{self.DID_METHOD}:entity:{entity_uuid}"
             wallet_did = f"did:{self.DID_METHOD}:wallet:{wallet_uuid}"
 
-            print(f"Created entity DID: {entity_did}")
-            print(f"Created wallet DID: {wallet_did}")
+            logger.debug("Created entity DID: %s", entity_did)
+            logger.debug("Created wallet DID: %s", wallet_did)
             
             return entity_did, wallet_did
             
         except Exception as e:
-            print(f"Error creating user DIDs: {e}")
+            logger.error("Error creating user DIDs: %s", e)
             return None, None
 
+    def _fetch_did_doc(self, did: str) -> Optional[Dict]:
+        """
+        Get a parsed DID document from the blockchain, reusing it for DID_DOC_CACHE_TTL seconds
+        
+        Returns a private copy, so callers are free to modify it.
+        """
+        did_doc = self._shared_did_doc(did)
+        return copy.deepcopy(did_doc) if did_doc is not None else None
+
+    def _did_doc_view(self, did: str) -> Optional[Mapping]:
+        """Read-only view of a DID document for evaluate_data_request, reused for EVALUATION_DOC_TTL seconds."""
+        now = time.monotonic()
+        with _evaluation_docs_lock:
+            entry = _evaluation_docs.get(did)
+            if entry is not None and entry[0] > now:
+                _evaluation_docs.move_to_end(did)
+                return entry[1]
+        
+        try:
+            did_doc = self._shared_did_doc(did)
+        except Exception as e:
+            logger.error("Error retrieving DID document: %s", e)
+            return None
+        if did_doc is None:
+            return None
+        
+        view = MappingProxyType(did_doc)
+        with _evaluation_docs_lock:
+            _evaluation_docs[did] = (now + EVALUATION_DOC_TTL, view)
+            _evaluation_docs.move_to_end(did)
+            while len(_evaluation_docs) > EVALUATION_DOC_MAX_ENTRIES:
+                _evaluation_docs.popitem(last=False)
+        return view
+
+    def _shared_did_doc(self, did: str) -> Optional[Dict]:
+        """The cached document itself; never hand this out without copying or wrapping it."""
+        now = time.monotonic()
+        with _did_doc_cache_lock:
+            entry = _did_doc_cache.get(did)
+            if entry is not None and entry[0] > now:
+                _did_doc_cache.move_to_end(did)
+                return entry[1]
+        
+        did_doc = self.blockchain_service.get_did_document(did)
+        if isinstance(did_doc, str):
+            did_doc = loads(did_doc)
+        if not did_doc:
+            return None
+        
+        with _did_doc_cache_lock:
+            _did_doc_cache[did] = (now + DID_DOC_CACHE_TTL, did_doc)
+            _did_doc_cache.move_to_end(did)
+            while len(_did_doc_cache) > DID_DOC_CACHE_MAX_ENTRIES:
+                _did_doc_cache.popitem(last=False)
+        return did_doc
+
     def get_user_vehicles(self, did: str) -> List[Dict]:
         """Get all vehicles owned by a user."""
         try:
-            vehicle_doc = self.blockchain_service.get_did_document(did)
+            vehicle_doc = self._fetch_did_doc(did)
             detailed_vehicles = []
             if vehicle_doc:
                 if isinstance(vehicle_doc, str):
-                    vehicle_doc = json.loads(vehicle_doc)
+                    vehicle_doc = loads(vehicle_doc)
 
                 # Get vehicle info from the vehicle's DID document
-                vehicle_info = None
-                for info in vehicle_doc.get('info', []):
-                    # Assuming you want to match by owner_did and some vehicle id
-                        vehicle_info = info
-                        break
-                print(f"info od fhrbtrw snd sm: {vehicle_info}")
+                vehicle_info = next(iter(vehicle_doc.get('info', [])), None)
+                logger.debug("Vehicle info: %s", vehicle_info)
                 if vehicle_info:
                     detailed_vehicles.append({
                         'name': f"{vehicle_info.get('make', '')} {vehicle_info.get('model', '')}",
@@ -182,35 +433,50 @@ class DIDService:
 
 
         except Exception as e:
-            print(f"Error getting user vehicles: {e}")
+            logger.error("Error getting user vehicles: %s", e)
             return []
 
+    def get_user_vehicles_bulk(self, dids: List[str]) -> List[List[Dict]]:
+        """
+        Get the vehicles for several DIDs, with the document reads running concurrently
+        
+        Args:
+            dids: The DIDs to look up
+            
+        Returns:
+            List[List[Dict]]: The vehicles for each DID, in the same order as dids
+        """
+        if len(dids) <= 1:
+            return [self.get_user_vehicles(did) for did in dids]
+        return list(_read_executor.map(self.get_user_vehicles, dids))
+
     def verify_signature(self, did: str, message: bytes, signature: bytes) -> bool:
         """Verify a signature using the DID's public key"""
         try:
-            _, public_key_pem = self.wallet.get_keys(did)
-            public_key = serialization.load_pem_public_key(public_key_pem)
-            
-            public_key.verify(
-                signature,
-                message,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH
-                ),
-                hashes.SHA256()
-            )
+            public_key = self.wallet.get_public_key_obj(did)
+            
+            if isinstance(public_key, ed25519.Ed25519PublicKey):
+                public_key.verify(signature, message)
+            else:
+                public_key.verify(
+                    signature,
+                    message,
+                    padding.PSS(
+                        mgf=padding.MGF1(hashes.SHA256()),
+                        salt_length=padding.PSS.MAX_LENGTH
+                    ),
+                    hashes.SHA256()
+                )
             return True
         except Exception:
             return False
 
     def sign_message(self, did: str, message: bytes) -> bytes:
         """Sign a message using the DID's private key"""
-        private_key_pem, _ = self.wallet.get_keys(did)
-        private_key = serialization.load_pem_private_key(
-            private_key_pem,
-            password=None
-        )
+        private_key = self.wallet.get_private_key_obj(did)
+        
+        if isinstance(private_key, ed25519.Ed25519PrivateKey):
+            return private_key.sign(message)
         
         signature = private_key.sign(
             message,
@@ -222,6 +488,60 @@ class DIDService:
         )
         return signature
 
+    def sign_prehashed(self, did: str, digest: bytes) -> bytes:
+        """Sign a SHA-256 digest using the DID's private key"""
+        private_key = self.wallet.get_private_key_obj(did)
+        
+        # Ed25519 has no prehashed mode in cryptography; the digest itself is the signed message
+        if isinstance(private_key, ed25519.Ed25519PrivateKey):
+            return private_key.sign(digest)
+        
+        return private_key.sign(
+            digest,
+            padding.PSS(
+                mgf=padding.MGF1(hashes.SHA256()),
+                salt_length=padding.PSS.MAX_LENGTH
+            ),
+            utils.Prehashed(hashes.SHA256())
+        )
+
+    def verify_prehashed(self, did: str, digest: bytes, signature: bytes) -> bool:
+        """Verify a signature over a SHA-256 digest using the DID's public key"""
+        try:
+            public_key = self.wallet.get_public_key_obj(did)
+            
+            if isinstance(public_key, ed25519.Ed25519PublicKey):
+                public_key.verify(signature, digest)
+            else:
+                public_key.verify(
+                    signature,
+                    digest,
+                    padding.PSS(
+                        mgf=padding.MGF1(hashes.SHA256()),
+                        salt_length=padding.PSS.MAX_LENGTH
+                    ),
+                    utils.Prehashed(hashes.SHA256())
+                )
+            return True
+        except Exception:
+            return False
+
+    def verify_credential_signature(self, credential: Dict) -> bool:
+        """Check a credential's proof against its issuer's key, using the same canonical digest as signing"""
+        unsigned = {key: value for key, value in credential.items() if key != "proof"}
+        proof = credential.get("proof") or {}
+        try:
+            signature = base64.b64decode(proof["signatureValue"])
+        except (KeyError, ValueError):
+            return False
+        return self.verify_prehashed(credential.get("issuer", ""), _credential_digest(unsigned), signature)
+
+    def signature_type(self, did: str) -> str:
+        """Proof type matching the algorithm of the DID's signing key"""
+        if isinstance(self.wallet.get_private_key_obj(did), ed25519.Ed25519PrivateKey):
+            return "Ed25519Signature2020"
+        return "RsaSignature2018"
+
     def get_did_document(self, did: str) -> Optional[Dict]:
         """
         Retrieve a DID document from the blockchain
@@ -234,7 +554,7 @@ class DIDService:
         """
         try:
             # Get the DID document from blockchain
-            did_doc = self.blockchain_service.get_did_document(did)
+            did_doc = self._fetch_did_doc(did)
             if did_doc:
                 # Verify the document structure
                 if '@context' not in did_doc:
@@ -244,11 +564,16 @@ class DIDService:
                 if 'verificationMethod' not in did_doc:
                     try:
                         # Get public key from wallet
-                        _, public_key = self.wallet.get_keys(did)
+                        public_key = self.wallet.get_public_pem(did)
                         key_id = f"{did}#keys-1"
+                        key_type = (
+                            "Ed25519VerificationKey2020"
+                            if isinstance(self.wallet.get_public_key_obj(did), ed25519.Ed25519PublicKey)
+                            else "RsaVerificationKey2018"
+                        )
                         verification_method = {
                             "id": key_id,
-                            "type": "RsaVerificationKey2018",
+                            "type": key_type,
                             "controller": did,
                             "publicKeyPem": public_key.decode('utf-8')
                         }
@@ -256,16 +581,34 @@ class DIDService:
                         did_doc['authentication'] = [key_id]
                         did_doc['assertionMethod'] = [key_id]
                     except Exception as e:
-                        print(f"Error adding verification method: {e}")
+                        logger.error("Error adding verification method: %s", e)
                 
                 return did_doc
             
             return None
             
         except Exception as e:
-            print(f"Error retrieving DID document: {e}")
+            logger.error("Error retrieving DID document: %s", e)
             return None
 
+    def get_did_documents(self, dids: List[str]) -> List[Optional[Dict]]:
+        """
+        Retrieve several DID documents, with the blockchain reads running concurrently
+        
+        Args:
+            dids: The DIDs to retrieve documents for
+            
+        Returns:
+            List[Optional[Dict]]: The documents in the same order as dids, None where not found
+        """
+        if len(dids) <= 1:
+            return [self.get_did_document(did) for did in dids]
+        return list(_read_executor.map(self.get_did_document, dids))
+
+    def has_did_document(self, did: str) -> bool:
+        """Check whether a DID resolves on the blockchain without building its document."""
+        return self.blockchain_service.has_did_document(did)
+
     def create_credential(self, issuer_did: str, subject_did: str, claims: Dict) -> Optional[Dict]:
         """Create a verifiable credential."""
         try:
@@ -275,14 +618,12 @@ class DIDService:
                 raise Exception("No blockchain address found for issuer")
             address, private_key = address_info
             
-            # Create blockchain service with issuer's address
-            blockchain_service = BlockchainService(account=address, private_key=private_key)
-
             # Generate a unique credential ID
-            credential_id = f"did:{self.DID_METHOD}:credential:{str(uuid.uuid4())}"
+            credential_id = f"did:{self.DID_METHOD}:credential:{uuid.uuid4()}"
+            now_iso = datetime.utcnow().isoformat()
             
-            # Get issuer's keys for signing
-            private_key_pem, _ = self.wallet.get_keys(issuer_did)
+            # Get issuer's proof type, which also checks its signing key exists
+            proof_type = self.signature_type(issuer_did)
             
             # Create the credential
             credential = {
@@ -293,7 +634,7 @@ class DIDService:
                 "id": credential_id,
                 "type": ["VerifiableCredential"] + ([claims["type"]] if "type" in claims else []),
                 "issuer": issuer_did,
-                "issuanceDate": datetime.utcnow().isoformat(),
+                "issuanceDate": now_iso,
                 "credentialSubject": {
                     "id": subject_did,
                     **claims
@@ -301,22 +642,20 @@ class DIDService:
             }
             
             # Sign the credential
-            credential_bytes = json.dumps(credential).encode()
-            signature = self.sign_message(issuer_did, credential_bytes)
+            signature = self.sign_prehashed(issuer_did, _credential_digest(credential))
             
             # Add the proof
             credential["proof"] = {
-                "type": "RsaSignature2018",
-                "created": datetime.utcnow().isoformat(),
+                "type": proof_type,
+                "created": now_iso,
                 "verificationMethod": f"{issuer_did}#keys-1",
                 "signatureValue": base64.b64encode(signature).decode()
             }
             
             # Store the credential on the blockchain using issuer's address
-            status = blockchain_service.store_did_document(
-                credential_id, 
-                json.dumps(credential)
-            )
+            with self.blockchain_service.use_account(address, private_key) as blockchain_service:
+                status = blockchain_service.store_did_document(credential_id, credential)
+            _forget_did_docs(credential_id)
             
             if not status:
                 raise Exception("Failed to store credential on blockchain")
@@ -324,15 +663,27 @@ class DIDService:
             return credential
             
         except Exception as e:
-            print(f"Error creating credential: {e}")
+            logger.error("Error creating credential: %s", e)
             return None
 
     def verify_credential(self, credential_id: str) -> Optional[Dict]:
         """Verify a credential by retrieving it from the blockchain."""
+        with _credential_cache_lock:
+            credential = _credential_cache.get(credential_id)
+            if credential is not None:
+                _credential_cache.move_to_end(credential_id)
+                return copy.deepcopy(credential)
+        
         credential_data = self.blockchain_service.get_credential(credential_id)
-        if credential_data:
-            return json.loads(credential_data)
-        return None
+        if not credential_data:
+            return None
+        credential = loads(credential_data)
+        
+        with _credential_cache_lock:
+            _credential_cache[credential_id] = credential
+            while len(_credential_cache) > CREDENTIAL_CACHE_MAX_ENTRIES:
+                _credential_cache.popitem(last=False)
+        return copy.deepcopy(credential)
 
     def verify_user_did(self, did: str) -> bool:
         """Verify if a user DID exists on the blockchain."""
@@ -359,34 +710,24 @@ class DIDService:
                 entity_did, wallet_did = self.create_user_dids()
                 address_info = self.address_manager.get_address(entity_did)
             except Exception as e:
-                print(f"Failed to get blockchain address: {e}")
+                logger.warning("Failed to get blockchain address: %s", e)
                 return None
                 
             if not address_info:
-                print("No available blockchain addresses")
+                logger.warning("No available blockchain addresses")
                 return None
                 
             address, private_key = address_info
-            print(f"Got address {address} with private key {private_key}")
+            logger.debug("Got address %s", address)
             
-            # Create a new blockchain service instance with the user's address
-            blockchain_service = BlockchainService(account=address, private_key=private_key)
+            # Send this user's transactions from their own address, leaving the shared service on the default account
+            blockchain_service = self.blockchain_service.for_account(address, private_key)
 
-            # Store the blockchain service instance for DID document storage
-            self.blockchain_service = blockchain_service
-
-            # Generate separate key pairs for both DIDs
-            entity_private_key, entity_public_key = self._generate_key_pair()
-            wallet_private_key, wallet_public_key = self._generate_key_pair()
-            
-            
-            # Create DID documents
-            entity_doc = DIDDocument(entity_did, entity_public_key)
-            wallet_doc = DIDDocument(wallet_did, wallet_public_key)
-          
+            # Generate separate key pairs for both DIDs while the registration transaction is mined
+            key_pairs = _read_executor.submit(self._generate_key_pairs, 2)
             
             # First register the user with both DIDs
-            print(f"Registering user with name: {name}, type: {user_type}, entity_did: {entity_did}, wallet_did: {wallet_did}")
+            logger.debug("Registering user with name: %s, type: %s, entity_did: %s, wallet_did: %s", name, user_type, entity_did, wallet_did)
             success, message = blockchain_service.register_user(
                 name, 
                 user_type,
@@ -395,16 +736,23 @@ class DIDService:
             )
             
             if not success:
-                print(f"Failed to register user: {message}")
+                logger.warning("Failed to register user: %s", message)
                 # Release the address back to the pool
                 self.address_manager.release_address(entity_did)
                 return None
                 
-            print("User registered successfully!")
+            logger.debug("User registered successfully!")
+            
+            (entity_private_key, entity_public_key, entity_public_pem), \
+                (wallet_private_key, wallet_public_key, wallet_public_pem) = key_pairs.result()
+            
+            # Create DID documents
+            entity_doc = DIDDocument(entity_did, entity_public_pem)
+            wallet_doc = DIDDocument(wallet_did, wallet_public_pem)
             
             # Store both key pairs in wallet
-            self.wallet.store_keys(entity_did, entity_private_key, entity_public_key)
-            self.wallet.store_keys(wallet_did, wallet_private_key, wallet_public_key)
+            self.wallet.store_keys(entity_did, entity_private_key, entity_public_key, entity_public_pem)
+            self.wallet.store_keys(wallet_did, wallet_private_key, wallet_public_key, wallet_public_pem)
            
             # Link the DIDs by adding controller relationships
             entity_doc.service_endpoints.append({
@@ -415,13 +763,6 @@ class DIDService:
             })
             entity_doc.type.append("Person")
             entity_doc.type.append("VerifiableCredential")
-            
-            entity_str = json.dumps(entity_doc.to_dict())
-            status = self.blockchain_service.store_did_document(entity_did, entity_str)
-
-            if not status:
-                self.address_manager.release_address(entity_did)
-                return None
 
             wallet_doc.service_endpoints.append({
                 "id": f"{entity_did}#entity",
@@ -432,10 +773,12 @@ class DIDService:
             wallet_doc.type.append("VerifiableCredential")
             wallet_doc.type.append("Wallet")
             
-            wallet_str = json.dumps(wallet_doc.to_dict())
-            
-            # Store on blockchain
-            status = self.blockchain_service.store_did_document(wallet_did, wallet_str)
+            # Store both documents on blockchain, waiting for the two receipts together
+            status = blockchain_service.store_did_documents([
+                (entity_did, entity_doc.to_dict()),
+                (wallet_did, wallet_doc.to_dict())
+            ])
+            _forget_did_docs(entity_did, wallet_did)
             if not status:
                 self.address_manager.release_address(entity_did)
                 return None
@@ -448,7 +791,7 @@ class DIDService:
             }
             
         except Exception as e:
-            print(f"Error creating DID: {e}")
+            logger.error("Error creating DID: %s", e)
             # Release the address back to the pool if we have a user_id
             if 'user_id' in locals():
                 self.address_manager.release_address(entity_did)
@@ -470,17 +813,12 @@ class DIDService:
             c = car_did_document.get('type', ["VerifiableCredential", "Car"])
          
 
-            self.set_account_address(vehicle_did)
-            # Generate separate key pairs for both DIDs
-            entity_private_key, entity_public_key = self._generate_key_pair()
-            wallet_private_key, wallet_public_key = self._generate_key_pair()
-
-            # Create DID documents for vehicle and wallet
-            vehicle_doc = DIDDocument(vehicle_did, entity_public_key)
-            wallet_doc = DIDDocument(wallet_did, wallet_public_key)
+            vehicle_service = self._sender_service(vehicle_did)
+            # Generate separate key pairs for both DIDs while the registration transaction is mined
+            key_pairs = _read_executor.submit(self._generate_key_pairs, 2)
 
             # Register vehicle in the blockchain using the CAR type from the enum
-            success, message = self.blockchain_service.register_user(
+            success, message = vehicle_service.register_user(
                 make + " " + model,  # vehicle name
                 "CAR",  # Use the string name for UserType.CAR
                 vehicle_did,
@@ -488,11 +826,19 @@ class DIDService:
             )
             
             if not success:
-                print(f"Failed to register car: {message}")
+                logger.warning("Failed to register car: %s", message)
                 self.address_manager.release_address(vehicle_did)
                 return None
                 
-            print("Car registered successfully!")
+            logger.debug("Car registered successfully!")
+
+            (entity_private_key, entity_public_key, entity_public_pem), \
+                (wallet_private_key, wallet_public_key, wallet_public_pem) = key_pairs.result()
+
+            # Create DID documents for vehicle and wallet, sharing one creation time
+            now = datetime.utcnow()
+            vehicle_doc = DIDDocument(vehicle_did, entity_public_pem, now)
+            wallet_doc = DIDDocument(wallet_did, wallet_public_pem, now)
 
             # Store keys in wallet
             vehicle_doc.info.extend([
@@ -517,15 +863,7 @@ class DIDService:
             # Add vehicle type
             vehicle_doc.type.extend(c)
 
-            # Store the vehicle DID document
-            vehicle_str = json.dumps(vehicle_doc.to_dict())
-            status = self.blockchain_service.store_did_document(vehicle_did, vehicle_str)
-            if not status:
-                print("Failed to store vehicle DID document")
-                self.address_manager.release_address(vehicle_did)
-                return None
-
-            # Store wallet DID document
+            # Build wallet DID document
             wallet_doc.service_endpoints.append({
                 "id": f"{wallet_did}#entity",
                 "type": "EntityLink",
@@ -534,27 +872,47 @@ class DIDService:
             })
             wallet_doc.type.extend(["VerifiableCredential", "VehicleWallet"])
 
-            wallet_str = json.dumps(wallet_doc.to_dict())
-            status = self.blockchain_service.store_did_document(wallet_did, wallet_str)
-            if not status:
-                print("Failed to store wallet DID document")
-                self.address_manager.release_address(vehicle_did)
-                return None
-
-            # Store keys in wallet
-            self.wallet.store_keys(vehicle_did, entity_private_key, entity_public_key)
-            self.wallet.store_keys(wallet_did, wallet_private_key, wallet_public_key)
-            
             data = {
                     "id": f"{vehicle_did}#vehicle_{vin}",
                     "type": "OwnedVehicle",
                     "vehicle_did": vehicle_did,
                     "wallet_did": wallet_did,
-                    "acquired_date": datetime.utcnow().isoformat()
+                    "acquired_date": now.isoformat()
                 }
 
-            # Get owner's DID document to update it with vehicle information
-            update = self.update_did_document(owner_did,None,data)
+            # Store vehicle and wallet DID documents, waiting for both receipts together
+            status = vehicle_service.store_did_documents([
+                (vehicle_did, vehicle_doc.to_dict()),
+                (wallet_did, wallet_doc.to_dict())
+            ])
+            _forget_did_docs(vehicle_did, wallet_did)
+            if not status:
+                logger.warning("Failed to store vehicle DID documents")
+                self.address_manager.release_address(vehicle_did)
+                return None
+
+            # Only list the vehicle on the owner's document once its own documents are on-chain;
+            # the owner's document can only be written from the owner's account
+            update_future = _read_executor.submit(self._add_owner_info, self._account_service(owner_did), owner_did, data)
+
+            # Write the on-chain vehicle record from the vehicle's account, so the vehicle
+            # resolves through vehicles(vin) as well as through its DID document
+            vehicle_record, vehicle_message = vehicle_service.register_vehicle(
+                vin,
+                owner_did,
+                vehicle_did,
+                int(year) if str(year).isdigit() else 0,
+                make,
+                model,
+                wallet_did
+            )
+            if not vehicle_record:
+                logger.warning("Failed to write vehicle record: %s", vehicle_message)
+
+            # Store keys in wallet
+            self.wallet.store_keys(vehicle_did, entity_private_key, entity_public_key, entity_public_pem)
+            self.wallet.store_keys(wallet_did, wallet_private_key, wallet_public_key, wallet_public_pem)
+            update = update_future.result()
 
             return {
                 "vehicle_did": vehicle_did,
@@ -565,26 +923,62 @@ class DIDService:
             }
                 
         except Exception as e:
-            print(f"Error creating vehicle DIDs: {e}")
+            logger.error("Error creating vehicle DIDs: %s", e)
             if 'vehicle_did' in locals():
                 self.address_manager.release_address(vehicle_did)
             return None
         
+    def _store_updated_doc(self, blockchain_service: BlockchainService, did: str, did_doc: Dict) -> bool:
+        """
+        Store a modified DID document and keep it as the cached copy when the write succeeds
+        
+        The next update of the same DID then starts from the cache and only costs its transaction.
+        """
+        status = blockchain_service.store_did_document(did, did_doc)
+        if status:
+            with _did_doc_cache_lock:
+                _did_doc_cache[did] = (time.monotonic() + DID_DOC_CACHE_TTL, copy.deepcopy(did_doc))
+                _did_doc_cache.move_to_end(did)
+            with _evaluation_docs_lock:
+                _evaluation_docs.pop(did, None)
+        else:
+            _forget_did_docs(did)
+        return status
+
+    def _add_owner_info(self, owner_service: Optional[BlockchainService], owner_did: str, info: Dict) -> Optional[bool]:
+        """Append an info entry to the owner's DID document, sending from the owner's account."""
+        try:
+            if owner_service is None:
+                return None
+            owner_doc = self._fetch_did_doc(owner_did)
+            if not owner_doc:
+                logger.warning("Failed to retrieve owner's DID document")
+                return None
+            owner_doc.setdefault('info', []).append(info)
+            status = self._store_updated_doc(owner_service, owner_did, owner_doc)
+            if not status:
+                logger.warning("Failed to update owner's DID document")
+                return None
+            return status
+        except Exception as e:
+            logger.error("Error updating owner's DID document: %s", e)
+            return None
+
     def update_did_document(self, did, car_did, credential=None): 
         """Update a DID document with new credential or owner information."""
         try:
             
             if not car_did:
-                self.set_account_address(did)
-                owner_doc = self.blockchain_service.get_did_document(did)
+                blockchain_service = self._sender_service(did)
+                owner_doc = self._fetch_did_doc(did)
                 if not owner_doc:
-                    print("Failed to retrieve owner's DID document")
+                    logger.warning("Failed to retrieve owner's DID document")
                     self.address_manager.release_address(did)
                     return None
 
                 # Convert owner_doc to dictionary if it's not already
                 if isinstance(owner_doc, str):
-                    owner_doc = json.loads(owner_doc)
+                    owner_doc = loads(owner_doc)
 
                 # Add vehicle to owner's document
                 if 'info' not in owner_doc:
@@ -593,24 +987,24 @@ class DIDService:
                 owner_doc['info'].append(credential)
 
                 # Update owner's document on blockchain
-                status = self.blockchain_service.store_did_document(did, json.dumps(owner_doc))
+                status = self._store_updated_doc(blockchain_service, did, owner_doc)
                 if not status:
-                    print("Failed to update owner's DID document")
+                    logger.warning("Failed to update owner's DID document")
                     return None
                 return status
             
             elif credential: 
                 # Update document with new credential
-                self.set_account_address(did)
+                blockchain_service = self._sender_service(did)
                 # Get and parse the document
-                did_doc = self.blockchain_service.get_did_document(did)
+                did_doc = self._fetch_did_doc(did)
                 if not did_doc:
-                    print("Failed to get DID document")
+                    logger.warning("Failed to get DID document")
                     return None
                 
                 # Parse the document if it's a string, otherwise use as is
                 if isinstance(did_doc, str):
-                    did_doc = json.loads(did_doc)
+                    did_doc = loads(did_doc)
                 
                 # Initialize credentials array if it doesn't exist
                 if 'credentials' not in did_doc:
@@ -620,25 +1014,24 @@ class DIDService:
                 did_doc['credentials'].append(credential)
                 
                 # Store updated document
-                did_str = json.dumps(did_doc)
-                status = self.blockchain_service.store_did_document(did, did_str)
+                status = self._store_updated_doc(blockchain_service, did, did_doc)
                 if not status:
-                    print("Failed to update DID document")
+                    logger.warning("Failed to update DID document")
                     return None
                 return status    
             
             else:
                 # Update vehicle owner
-                self.set_account_address(car_did)
+                blockchain_service = self._sender_service(car_did)
                 # Get and parse the document
-                did_doc = self.blockchain_service.get_did_document(car_did)
+                did_doc = self._fetch_did_doc(car_did)
                 if not did_doc:
-                    print("Failed to get DID document")
+                    logger.warning("Failed to get DID document")
                     return None
 
                 # Parse the document if it's a string, otherwise use as is
                 if isinstance(did_doc, str):
-                    did_doc = json.loads(did_doc)
+                    did_doc = loads(did_doc)
 
                 # Initialize info array if it doesn't exist
                 if 'info' not in did_doc:
@@ -660,36 +1053,42 @@ class DIDService:
                 owner_info['owner_did'] = did
 
                 # Store updated document
-                did_str = json.dumps(did_doc)
-                status = self.blockchain_service.store_did_document(car_did, did_str)
+                status = self._store_updated_doc(blockchain_service, car_did, did_doc)
                 if not status:
-                    print("Failed to update DID document")
+                    logger.warning("Failed to update DID document")
                     return None
 
                 return status
 
             
         except Exception as e:
-            print(f"Error updating DID document: {e}")
+            logger.error("Error updating DID document: %s", e)
             return None
         
 
 
-    def set_account_address(self, did):
-        # Update vehicle owner
+    def _sender_service(self, did) -> BlockchainService:
+        """
+        Blockchain service to send the DID's transactions from, or the default account's if it has no address
+        
+        This DIDService is shared across sessions, so the account is never swapped on self.blockchain_service.
+        """
+        return self._account_service(did) or self.blockchain_service
+
+    def _account_service(self, did) -> Optional[BlockchainService]:
+        """Blockchain service that sends from the address assigned to the DID"""
         address_info = self.address_manager.get_address(did)
         if not address_info:
-            print("No available blockchain addresses")
+            logger.warning("No available blockchain addresses")
             return None
             
         address, private_key = address_info
-        print(f"Got address {address} with private key {private_key}")
+        logger.debug("Got address %s", address)
         if not address or not private_key:
-            print("Failed to get address or private key")
+            logger.warning("Failed to get address or private key")
             return None
         # Create blockchain service instance with owner's credentials
-        blockchain_service = BlockchainService(account=address, private_key=private_key)
-        self.blockchain_service = blockchain_service    
+        return self.blockchain_service.for_account(address, private_key)
 
     def encrypt_didcomm_message(self, message: Dict, sender_key: str, recipient_key: str) -> Dict:
         """
@@ -712,6 +1111,20 @@ class DIDService:
             "recipient_key": recipient_key
         }
 
+    def encrypt_didcomm_message_async(self, message: Dict, sender_key: str, recipient_key: str) -> Future:
+        """
+        Encrypt a DIDComm message on the shared DIDComm worker pool.
+        
+        Args:
+            message: The DIDComm message to encrypt
+            sender_key: The sender's authentication key
+            recipient_key: The recipient's key agreement key
+            
+        Returns:
+            Future: Resolves to the encrypted message
+        """
+        return _didcomm_executor.submit(self.encrypt_didcomm_message, message, sender_key, recipient_key)
+
     def decrypt_didcomm_message(self, encrypted_message: Dict, decryption_key: str) -> Dict:
         """
         Decrypt a DIDComm message.
@@ -788,9 +1201,9 @@ class DIDService:
         Returns:
             Tuple[bool, str, Dict]: (approved, reason, suggested_response)
         """
-        # Get entity information
-        requester_doc = self.get_did_document(requester_did)
-        subject_doc = self.get_did_document(subject_did)
+        # Get entity information; only type and name are read, so the shared cached views are enough
+        requester_doc = self._did_doc_view(requester_did)
+        subject_doc = self._did_doc_view(subject_did)
         
         if not requester_doc or not subject_doc:
             return False, "Invalid DIDs", {}
@@ -827,20 +1240,17 @@ class DIDService:
             }
         
         # Evaluate based on message type and context
-        message_type = context.get("message_type", "").lower()
+        message_type = context.get("message_type", "").casefold()
         message_content = context.get("content", "").strip()
         
         # Automatic approval for traffic-related requests from RSU
-        if "roadside_unit" in requester_type.lower():
-            response_message = ""
-            if "traffic" in message_type.lower():
-                response_message = "Traffic data access granted for traffic management"
-            elif message_type == "road condition":
-                response_message = "Road condition data access granted for safety monitoring"
-            elif message_type == "weather alert":
-                response_message = "Weather-related data access granted for safety alerts"
-            else:
-                response_message = "Data access granted for RSU monitoring"
+        if "roadside_unit" in requester_type.casefold():
+            response_message = _RSU_RESPONSES.get(message_type)
+            if response_message is None:
+                if any(token in message_type for token in _TRAFFIC_TOKENS):
+                    response_message = _RSU_TRAFFIC_RESPONSE
+                else:
+                    response_message = _RSU_DEFAULT_RESPONSE
                 
             return True, "Valid RSU request", {
                 "message": response_message,
@@ -869,7 +1279,7 @@ class DIDService:
             interactions = self.blockchain_service.get_entity_interactions(entity_did)
             return interactions
         except Exception as e:
-            print(f"Error getting entity interactions: {e}")
+            logger.error("Error getting entity interactions: %s", e)
             return []
 
     def record_interaction(self, source_address: str, destination_address: str, 
@@ -877,8 +1287,7 @@ class DIDService:
                          interaction_type: str, payload: bytes) -> bool:
         """Record an interaction between any two entities."""
         try:
-            self.set_account_address(source_identifier)
-            tx_hash = self.blockchain_service.record_interaction(
+            tx_hash = self._sender_service(source_identifier).record_interaction(
                 source_address,
                 destination_address,
                 source_identifier,
@@ -886,9 +1295,10 @@ class DIDService:
                 interaction_type,
                 payload
             )
+            _forget_did_docs(source_identifier, destination_identifier)
             return tx_hash
         except Exception as e:
-            print(f"Error recording entity interaction: {e}")
+            logger.error("Error recording entity interaction: %s", e)
             return False
 
 # Export the DIDService class
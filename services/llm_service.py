@@ -1,9 +1,13 @@
 import json
 import os
+import threading
+from concurrent.futures import Future
 from pathlib import Path
+from queue import Empty, Queue
 import google.generativeai as genai
 from typing import Dict, Any, Optional
-from services.blockchain_service import BlockchainService
+from services.serialization import loads
+from services.bootstrap import get_blockchain_service
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,8 +15,12 @@ load_dotenv()
 
 PREFERENCES_FILE = Path(__file__).parent.parent / "api/wallet_preferences.json"
 
+# Local model calls are aggregated into one padded generate() per scheduler iteration
+MAX_BATCH_SIZE = 8
+
 class LLMService:
-    def __init__(self, api_key=None, use_local_model=True, local_model_path=None):
+    def __init__(self, api_key=None, use_local_model=True, local_model_path=None,
+                 max_batch_size=MAX_BATCH_SIZE):
         """
         Initialize the LLM service with support for both local Llama model and Google's Generative AI
         
@@ -20,10 +28,15 @@ class LLMService:
             api_key: Google API key for authentication (will load from .env if not provided)
             use_local_model: Whether to try using local Llama model first
             local_model_path: Path to local Llama model (optional)
+            max_batch_size: Most prompts the local model generates for in one call
         """
-        self.blockchain = BlockchainService()
+        self.blockchain = get_blockchain_service()
         self.model = None
         self.model_type = None
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending = Queue()
+        self._batch_worker = None
+        self._batch_lock = threading.Lock()
         
         # Try to initialize local model first if requested
         if use_local_model:
@@ -61,6 +74,10 @@ class LLMService:
                 model_name,
                 trust_remote_code=True
             )
+            # Batched prompts are left-padded so generation continues from the real tokens
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            self.tokenizer.padding_side = "left"
             
             self.model = AutoModelForCausalLM.from_pretrained(
                 model_name,
@@ -97,41 +114,89 @@ class LLMService:
             raise Exception(f"Failed to initialize Google API: {e}")
 
     def _generate_with_local_model(self, prompt):
-        """Generate response using local Llama model"""
+        """Generate response using local Llama model, batched with concurrent prompts"""
+        future = Future()
+        self._pending.put((prompt, future))
+        self._ensure_batch_worker()
+        return future.result()
+
+    def _ensure_batch_worker(self):
+        """Start the background thread that drains the pending prompt queue"""
+        with self._batch_lock:
+            if self._batch_worker is None:
+                self._batch_worker = threading.Thread(
+                    target=self._batch_loop, name="llm-batch", daemon=True
+                )
+                self._batch_worker.start()
+
+    def _next_batch(self):
+        """
+        Block for one prompt, then admit everything that arrived while the
+        previous generate() ran. There is no batching window: a prompt that
+        arrives mid-iteration joins the next one instead of waiting on a timer.
+        """
+        batch = [self._pending.get()]
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._pending.get_nowait())
+            except Empty:
+                break
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            batch = self._next_batch()
+            prompts = [prompt for prompt, _ in batch]
+            try:
+                responses = self._generate_batch_with_local_model(prompts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), response in zip(batch, responses):
+                future.set_result(response)
+
+    def _generate_batch_with_local_model(self, prompts):
+        """Generate responses for several prompts with a single padded generate() call"""
         try:
-            # Prepare the input with proper chat template
-            messages = [
-                {"role": "system", "content": "You are a helpful AI assistant that evaluates data sharing requests in IoV-SSI context."},
-                {"role": "user", "content": prompt}
+            import torch
+
+            # Prepare the inputs with proper chat template
+            input_texts = [
+                self.tokenizer.apply_chat_template(
+                    [
+                        {"role": "system", "content": "You are a helpful AI assistant that evaluates data sharing requests in IoV-SSI context."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    tokenize=False,
+                    add_generation_prompt=True
+                )
+                for prompt in prompts
             ]
             
-            # Apply chat template
-            input_text = self.tokenizer.apply_chat_template(
-                messages,
-                tokenize=False,
-                add_generation_prompt=True
-            )
-            
-            # Tokenize input
-            inputs = self.tokenizer(input_text, return_tensors="pt")
+            # Tokenize inputs
+            inputs = self.tokenizer(input_texts, return_tensors="pt", padding=True)
             
             # Move to same device as model
             if hasattr(self.model, 'device'):
                 inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
             
-            # Generate response
+            # Generate responses
             with torch.no_grad():
                 outputs = self.model.generate(
                     **inputs,
                     max_new_tokens=512,
                     temperature=0.7,
                     do_sample=True,
-                    pad_token_id=self.tokenizer.eos_token_id
+                    pad_token_id=self.tokenizer.pad_token_id
                 )
             
-            # Decode response
-            response = self.tokenizer.decode(outputs[0][inputs['input_ids'].shape[1]:], skip_special_tokens=True)
-            return response.strip()
+            # Decode responses, skipping the (left-padded) prompt tokens
+            prompt_length = inputs['input_ids'].shape[1]
+            return [
+                self.tokenizer.decode(output[prompt_length:], skip_special_tokens=True).strip()
+                for output in outputs
+            ]
             
         except Exception as e:
             print(f"Error generating with local model: {e}")
@@ -212,7 +277,7 @@ class LLMService:
             if not payload:
                 return "Error: Payload missing from the request."
 
-            payload = json.loads(payload)
+            payload = loads(payload)
         except (json.JSONDecodeError, TypeError) as e:
             return f"Error: Invalid payload format. {e}"
 
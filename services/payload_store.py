@@ -0,0 +1,55 @@
+import hashlib
+import os
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Optional
+
+# Content store for interaction payloads, anchored at the repo root so the Streamlit app
+# and the API server resolve the same references whatever their working directory
+PAYLOAD_DIRECTORY = Path(__file__).parent.parent / "did_wallet" / "payloads"
+# Prefix of content-addressed interaction payload references stored on-chain
+PAYLOAD_REF_PREFIX = b'cid:sha256:'
+
+def store_payload(payload: bytes) -> bytes:
+    """
+    Compress an interaction payload into the content store.
+
+    Returns:
+        bytes: Content-addressed reference to record on-chain instead of the payload
+    """
+    compressed = zlib.compress(payload, 9)
+    digest = hashlib.sha256(compressed).hexdigest()
+    path = PAYLOAD_DIRECTORY / f"{digest}.z"
+    if not path.exists():
+        PAYLOAD_DIRECTORY.mkdir(parents=True, exist_ok=True)
+        # Write under a unique temporary name so a concurrent reader never sees a partial file
+        # and concurrent writers of the same payload never share a temp file
+        with tempfile.NamedTemporaryFile(dir=PAYLOAD_DIRECTORY, suffix=".tmp", delete=False) as tmp:
+            tmp.write(compressed)
+        try:
+            os.replace(tmp.name, path)
+        except OSError:
+            os.unlink(tmp.name)
+            # Another writer stored the same content first; its file is identical
+            if not path.exists():
+                raise
+    return PAYLOAD_REF_PREFIX + digest.encode('ascii')
+
+def is_payload_ref(payload) -> bool:
+    """Whether an on-chain payload is a content store reference rather than inline data."""
+    return isinstance(payload, (bytes, bytearray)) and bytes(payload[:len(PAYLOAD_REF_PREFIX)]) == PAYLOAD_REF_PREFIX
+
+def load_payload(payload: bytes) -> Optional[bytes]:
+    """
+    Resolve an on-chain payload reference back to the original bytes.
+    Payloads recorded inline are returned unchanged; unknown references give None.
+    """
+    if not is_payload_ref(payload):
+        return payload
+    digest = bytes(payload[len(PAYLOAD_REF_PREFIX):]).decode('ascii')
+    path = PAYLOAD_DIRECTORY / f"{digest}.z"
+    try:
+        return zlib.decompress(path.read_bytes())
+    except (OSError, zlib.error):
+        return None
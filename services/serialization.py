@@ -0,0 +1,42 @@
+"""
+JSON helpers used on hot decode/encode paths.
+
+orjson is used when installed; otherwise the standard library json module
+is used with the same call signatures.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def loads(data):
+    """
+    Parse JSON from str, bytes or bytearray.
+    
+    Args:
+        data: JSON document; bytes are parsed directly without decoding to str
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON bytes.
+    
+    Args:
+        obj: JSON-serializable object
+        indent: Pretty-print with two-space indentation instead of compact output
+        sort_keys: Sort object keys, giving a canonical form for hashing and signing
+    """
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option or None)
+    if indent:
+        return json.dumps(obj, indent=2, sort_keys=sort_keys).encode('utf-8')
+    # Compact output matches orjson byte for byte, so canonical forms do not depend on which is installed
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, sort_keys=sort_keys).encode('utf-8')
@@ -1,7 +1,6 @@
 # services/verification_service.py
 from typing import Dict, Optional
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.asymmetric import ed25519
 from models.vehicle import Vehicle
 from services.blockchain_service import BlockchainService
 from services.did_services import DIDService
@@ -12,18 +11,8 @@ class VehicleVerificationService:
         self.did_service = did_service
 
     def generate_verification_challenge(self, vehicle: Vehicle) -> str:
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048
-        )
-        challenge = private_key.sign(
-            vehicle.vin.encode(),
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        challenge = private_key.sign(vehicle.vin.encode())
         return challenge.hex()
 
     def verify_vehicle(self, vehicle: Vehicle, verification_data: Dict) -> bool:
@@ -1,15 +1,25 @@
 import json
+import mmap
 import os
+import threading
 from typing import Dict, Optional, List
 from datetime import datetime
+from services.payload_store import load_payload, store_payload
 
 class WalletService:
+    # Number of DIDComm log appends between fsyncs
+    MESSAGE_FSYNC_INTERVAL = 16
+
     def __init__(self, wallet_directory='did_wallet'):
         self.wallet_directory = wallet_directory
+        self.message_directory = os.path.join(wallet_directory, 'messages')
         self.wallets = {}
         self.load_wallets()  # Load existing wallets from JSON files
         self.notifications = {}
         self.messages = {}
+        self._unsynced_appends = 0
+        # One instance serves every Streamlit session, so message logs and pending requests are guarded
+        self._lock = threading.RLock()
         self.default_policies = {
             'location': {
                 'share_with': ['emergency'],
@@ -38,6 +48,7 @@ class WalletService:
             }
         }
         self.blocked_users = {}
+        self.policy_versions = {}
 
     def load_wallets(self):
         """Load wallets from JSON files."""
@@ -67,7 +78,6 @@ class WalletService:
                 'pending_requests': []
             }
             self.notifications[did] = []
-            self.messages[did] = []
             self.blocked_users[did] = []
 
             # Save the new wallet to a JSON file
@@ -78,6 +88,7 @@ class WalletService:
         """Update sharing policy for a specific data type."""
         if did in self.wallets and data_type in self.wallets[did]['policies']:
             self.wallets[did]['policies'][data_type].update(policy)
+            self.policy_versions[did] = self.policy_versions.get(did, 0) + 1
             # Save updated wallet to JSON file
             self.save_wallet(did)
             return True
@@ -85,17 +96,51 @@ class WalletService:
 
     # Include similar save calls in other methods where the wallet is modified
 
+    def _load_wallet(self, did: str):
+        """
+        Load one wallet from its JSON file if it is not in memory yet.
+        
+        This instance lives for the whole server process, so wallets written by another
+        process (e.g. the API server) after startup are picked up here on first use.
+        """
+        wallet = self.wallets.get(did)
+        if wallet is not None:
+            return wallet
+        path = os.path.join(self.wallet_directory, f"{did}.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                wallet = json.load(f)
+        except (OSError, ValueError):
+            # Missing or half-written by the other process; try again on the next call
+            return None
+        with self._lock:
+            return self.wallets.setdefault(did, wallet)
+
     def get_wallet(self, did: str):
         """Get wallet for an entity."""
-        return self.wallets.get(did)
+        return self._load_wallet(did)
+
+    def get_or_create_wallet(self, did: str, entity_type: str):
+        """Get wallet for an entity, creating it first if it doesn't exist."""
+        wallet = self._load_wallet(did)
+        if wallet is None:
+            wallet = self.create_wallet(did, entity_type)
+        return wallet
 
     def update_policy(self, did: str, data_type: str, policy: dict):
         """Update sharing policy for a specific data type."""
         if did in self.wallets and data_type in self.wallets[did]['policies']:
             self.wallets[did]['policies'][data_type].update(policy)
+            self.policy_versions[did] = self.policy_versions.get(did, 0) + 1
             return True
         return False
 
+    def get_policy_version(self, did: str) -> int:
+        """Get a counter that changes whenever the entity's policies are updated."""
+        return self.policy_versions.get(did, 0)
+
     def check_permission(self, requester_type: str, owner_did: str, data_type: str, is_emergency: bool = False) -> bool:
         """Check if requester has permission to access data."""
         wallet = self.wallets.get(owner_did)
@@ -186,40 +231,63 @@ class WalletService:
             return wallet['shared_data'].get(data_type)
         return None
 
+    def _message_log_path(self, did: str) -> str:
+        """Path of the append-only DIDComm log for a DID."""
+        return os.path.join(self.message_directory, f"{did}.jsonl")
+
+    def _load_messages(self, did: str):
+        """Load a DID's DIDComm messages from its log."""
+        messages = []
+        path = self._message_log_path(did)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log:
+                for line in iter(log.readline, b''):
+                    messages.append(json.loads(line))
+        self.messages[did] = messages
+
+    def _append_message(self, did: str, message: dict):
+        """Append one message to the DID's log instead of rewriting a file."""
+        os.makedirs(self.message_directory, exist_ok=True)
+        line = json.dumps(message, default=str).encode('utf-8') + b'\n'
+        with open(self._message_log_path(did), 'ab') as f:
+            f.write(line)
+            self._unsynced_appends += 1
+            if self._unsynced_appends >= self.MESSAGE_FSYNC_INTERVAL:
+                f.flush()
+                os.fsync(f.fileno())
+                self._unsynced_appends = 0
+
     def store_didcomm_message(self, did: str, message: dict):
         """Store a DIDComm message in the wallet."""
-        if did not in self.messages:
-            self.messages[did] = []
-        
         # Add timestamp if not present
         if 'timestamp' not in message:
             message['timestamp'] = datetime.now().isoformat()
             
-        self.messages[did].append(message)
-        
-        # If it's a request, also add to pending requests
-        if message.get('type') == 'request':
-            self.add_pending_request(did, message)
+        with self._lock:
+            if did not in self.messages:
+                self._load_messages(did)
+            self.messages[did].append(message)
+            self._append_message(did, message)
+            
+            # If it's a request, also add to pending requests
+            if message.get('type') == 'request':
+                self.add_pending_request(did, message)
             
         return True
 
     def get_didcomm_messages(self, did: str) -> list:
         """Get all DIDComm messages for a DID."""
-        if did not in self.messages:
-            return []
+        with self._lock:
+            if did not in self.messages:
+                self._load_messages(did)
+            messages = list(self.messages[did])
         # Sort messages by timestamp
-        return sorted(self.messages[did], 
+        return sorted(messages, 
                      key=lambda x: x.get('timestamp', ''),
                      reverse=True)
 
     def add_pending_request(self, did: str, request: dict):
         """Add a pending request to the wallet."""
-        if did not in self.wallets:
-            self.create_wallet(did, 'unknown')
-            
-        if 'pending_requests' not in self.wallets[did]:
-            self.wallets[did]['pending_requests'] = []
-            
         # Add timestamp if not present
         if 'timestamp' not in request:
             request['timestamp'] = datetime.now().isoformat()
@@ -228,7 +296,14 @@ class WalletService:
         if 'id' not in request:
             request['id'] = f"{request.get('sender_did', 'unknown')}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
             
-        self.wallets[did]['pending_requests'].append(request)
+        with self._lock:
+            if did not in self.wallets:
+                self.create_wallet(did, 'unknown')
+                
+            if 'pending_requests' not in self.wallets[did]:
+                self.wallets[did]['pending_requests'] = []
+                
+            self.wallets[did]['pending_requests'].append(request)
         return True
 
     def get_pending_requests(self, did: str) -> list:
@@ -248,13 +323,30 @@ class WalletService:
             return False
             
         # Remove request by matching either ID or entire request
-        self.wallets[did]['pending_requests'] = [
-            req for req in self.wallets[did].get('pending_requests', [])
-            if (req.get('id') != request.get('id') if 'id' in request 
-                else req != request)
-        ]
+        with self._lock:
+            self.wallets[did]['pending_requests'] = [
+                req for req in self.wallets[did].get('pending_requests', [])
+                if (req.get('id') != request.get('id') if 'id' in request 
+                    else req != request)
+            ]
         return True
 
+    def store_interaction_payload(self, payload: bytes) -> bytes:
+        """
+        Compress an interaction payload into the shared content store.
+        
+        Returns:
+            bytes: Content-addressed reference to record on-chain instead of the payload
+        """
+        return store_payload(payload)
+
+    def load_interaction_payload(self, payload: bytes) -> Optional[bytes]:
+        """
+        Resolve an on-chain payload reference back to the original bytes.
+        Payloads recorded inline are returned unchanged.
+        """
+        return load_payload(payload)
+
     def store_credential(self, did: str, credential: Dict):
         """Store a verifiable credential in the wallet."""
         if did not in self.wallets:
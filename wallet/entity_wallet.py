@@ -6,6 +6,10 @@ from datetime import datetime
 import pandas as pd
 import json
 from typing import Optional, Dict, Any
+from services.serialization import loads
+
+# Display format for interaction timestamps
+_TS_FMT = "%Y-%m-%d %H:%M:%S"
 
 class SmartCarSimulator:
     def __init__(self):
@@ -199,7 +203,7 @@ class EntityWallet:
             if 'destination_identifier' in response:
                 if (response['destination_identifier'] == st.session_state.did and 
                     response['interaction_type'] == 'request'):
-                    payload = json.loads(response["payload"])
+                    payload = loads(response["payload"])
                     st.markdown("inside payload")
                     st.write(payload)
                     with st.expander(f"Request from {response['source_identifier']}"):
@@ -292,7 +296,7 @@ class EntityWallet:
         message_pairs = {}
         for message in messages:
             try:
-                payload = json.loads(message['payload'])
+                payload = loads(message['payload'])
                 request_id = payload.get('request_id')
                 if request_id:
                     if request_id not in message_pairs:
@@ -319,13 +323,13 @@ class EntityWallet:
                 if pair['request']:
                     req = pair['request']
                     try:
-                        req_payload = json.loads(req['payload'])
+                        req_payload = loads(req['payload'])
                         st.write(f"**From:**")
                         # st.json(prev_owners)
                         st.text(req['source_identifier'])
                     
                         dt_object = datetime.fromtimestamp(req['timestamp'])
-                        st.markdown(f"**Time:** {dt_object.strftime('%Y-%m-%d %H:%M:%S')}")
+                        st.markdown(f"**Time:** {dt_object.strftime(_TS_FMT)}")
                         st.markdown(f"**Type:** {req_payload.get('message_type', 'N/A')}")
                         st.markdown(f"**Content:** {req_payload.get('content', 'N/A')}")
                         if 'requested_data' in req_payload:
@@ -343,12 +347,12 @@ class EntityWallet:
                 if pair['response']:
                     resp = pair['response']
                     try:
-                        resp_payload = json.loads(resp['payload'])
+                        resp_payload = loads(resp['payload'])
                         st.write(f"**To:**")
                         # st.json(prev_owners)
                         st.text(req['source_identifier'])
                         dt_object = datetime.fromtimestamp(resp['timestamp'])
-                        st.markdown(f"**Time:** {dt_object.strftime('%Y-%m-%d %H:%M:%S')}")
+                        st.markdown(f"**Time:** {dt_object.strftime(_TS_FMT)}")
                         st.markdown(f"**Type:** {resp_payload.get('response_type', 'N/A')}")
                         
                         if 'llm_reason' in resp: